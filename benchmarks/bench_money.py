@@ -0,0 +1,168 @@
+"""
+Benchmark: exact integer-cents revenue sums vs the old float loops.
+
+Run from the project root:
+    python benchmarks/bench_money.py [rows]
+
+The cents are computed while parsing (AmountCents), so the timed paths start
+from the raw lines: parse_transactions(encode=False) + cents sums, against the
+same parse loop without the AmountCents lines + the old float sums.
+Also checks that the cents totals do not change when the transactions are
+shuffled (the float totals usually do).
+Exits with 1 if the cents path is more than SLOWER_TOLERANCE slower than the
+float path, or if the cents totals depend on the order.
+"""
+import contextlib
+import io
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.file_handler import parse_transactions
+from utils.data_processor import calculate_total_revenue, region_wise_sales
+
+# timing noise allowed before "cents is slower" fails the run
+SLOWER_TOLERANCE = 0.05
+
+
+def make_lines(rows, seed=42):
+    rng = random.Random(seed)
+    regions = ["North", "South", "East", "West"]
+    lines = []
+    for i in range(rows):
+        price = f"{rng.randint(1, 5000)}.{rng.randint(0, 99):02d}"
+        lines.append(
+            f"T{i}|2024-12-{rng.randint(1, 28):02d}|P{rng.randint(100, 199)}|"
+            f"Product {rng.randint(100, 199)}|{rng.randint(1, 20)}|{price}|"
+            f"C{rng.randint(1, 5000):04d}|{rng.choice(regions)}"
+        )
+    return lines
+
+
+def float_parse_transactions(raw_lines):
+    # parse_transactions(encode=False) without the AmountCents lines
+    transactions = []
+    append = transactions.append
+    rejected = []
+    for line in raw_lines:
+        parts = line.split("|")
+        if len(parts) != 8:
+            rejected.append((len(transactions) + len(rejected), "fields", line))
+            continue
+        transaction_id, date, product_id, product_name, qty_str, price_str, customer_id, region = parts
+        if "," in line:
+            product_name = product_name.replace(",", "")
+            qty_str = qty_str.replace(",", "")
+            price_str = price_str.replace(",", "")
+        try:
+            quantity = int(qty_str)
+            unit_price = float(price_str)
+        except ValueError:
+            rejected.append((len(transactions) + len(rejected), "number", line))
+            continue
+        append({
+            "TransactionID": transaction_id,
+            "Date": date,
+            "ProductID": product_id,
+            "ProductName": product_name,
+            "Quantity": quantity,
+            "UnitPrice": unit_price,
+            "CustomerID": customer_id,
+            "Region": region,
+        })
+    return transactions
+
+
+def cents_parse_transactions(raw_lines):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return parse_transactions(raw_lines, encode=False)
+
+
+def float_total_revenue(transactions):
+    # the old calculate_total_revenue loop
+    total = 0.0
+    for tx in transactions:
+        try:
+            qty = int(tx["Quantity"])
+            price = float(tx["UnitPrice"])
+            total += qty * price
+        except (KeyError, TypeError, ValueError):
+            continue
+    return total
+
+
+def float_region_totals(transactions):
+    # the old region_wise_sales accumulation loop (without percentages/sort)
+    region_stats = {}
+    for tx in transactions:
+        try:
+            region = tx["Region"]
+            revenue = int(tx["Quantity"]) * float(tx["UnitPrice"])
+        except (KeyError, TypeError, ValueError):
+            continue
+        if region not in region_stats:
+            region_stats[region] = {"total_sales": 0.0, "transaction_count": 0}
+        region_stats[region]["total_sales"] += revenue
+        region_stats[region]["transaction_count"] += 1
+    return region_stats
+
+
+def best_time(func, data, repeat=5):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(data)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+
+    lines = make_lines(rows)
+    transactions = cents_parse_transactions(lines)
+    float_transactions = float_parse_transactions(lines)
+
+    def float_path(raw_lines):
+        parsed = float_parse_transactions(raw_lines)
+        float_total_revenue(parsed)
+        float_region_totals(parsed)
+
+    def cents_path(raw_lines):
+        parsed = cents_parse_transactions(raw_lines)
+        calculate_total_revenue(parsed)
+        region_wise_sales(parsed)
+
+    print(f"Rows: {len(transactions)}")
+    for label, old_func, new_func, old_data, new_data in [
+        ("total revenue", float_total_revenue, calculate_total_revenue, float_transactions, transactions),
+        ("region sales ", float_region_totals, region_wise_sales, float_transactions, transactions),
+        ("parse        ", float_parse_transactions, cents_parse_transactions, lines, lines),
+        ("parse + sums ", float_path, cents_path, lines, lines),
+    ]:
+        old_time = best_time(old_func, old_data)
+        new_time = best_time(new_func, new_data)
+        print(f"{label}: float {old_time:.3f}s | cents {new_time:.3f}s ({old_time / new_time:.2f}x)")
+    # the last row is the whole path the pipeline runs
+    cents_slower = new_time > old_time * (1 + SLOWER_TOLERANCE)
+    if cents_slower:
+        print(f"Cents path is slower than the float path (more than {SLOWER_TOLERANCE:.0%})")
+
+    shuffled = transactions[:]
+    random.Random(7).shuffle(shuffled)
+
+    float_same = float_total_revenue(transactions) == float_total_revenue(shuffled)
+    cents_same = calculate_total_revenue(transactions) == calculate_total_revenue(shuffled)
+    regions_same = region_wise_sales(transactions) == region_wise_sales(shuffled)
+    print(f"Order independent: float total {float_same} | cents total {cents_same} | regions {regions_same}")
+
+    if cents_slower or not (cents_same and regions_same):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
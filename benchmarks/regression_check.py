@@ -0,0 +1,341 @@
+"""
+Performance regression check for the whole sales pipeline.
+
+Runs utils.pipeline.run_pipeline(): load -> validate -> analyze -> enrich ->
+write, the same stage functions main.py calls (without the prompts and the
+API call), on fixed synthetic datasets, records throughput, peak memory and
+per-stage timings, and compares them with a stored baseline.
+
+Run from the project root:
+    python benchmarks/regression_check.py                   # 10k and 1M rows
+    python benchmarks/regression_check.py --large           # + 10M rows (~14 GB RAM)
+    python benchmarks/regression_check.py --sizes 10000,100000
+    python benchmarks/regression_check.py --update-baseline # store as baseline
+
+Each run happens in a fresh subprocess (clean memory peak, no caches).
+Exit code: 0 = no regression (or --update-baseline), 1 = regression beyond
+the threshold, 2 = no baseline file / sizes missing from the baseline.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+DEFAULT_SIZES = "10000,1000000"
+# only with --large: the pipeline holds every row in memory, about 1.3 GB
+# peak RSS per million rows, so 10M rows need ~13-14 GB of RAM
+LARGE_SIZE = 10000000
+DEFAULT_BASELINE = os.path.join(PROJECT_ROOT, "benchmarks", "baseline.json")
+DEFAULT_RESULTS = os.path.join(PROJECT_ROOT, "benchmarks", "results", "latest.json")
+DEFAULT_DATA_DIR = os.path.join(tempfile.gettempdir(), "sales_regression_data")
+
+# same stages as utils.pipeline.PIPELINE_STAGES (kept literal so the
+# parent process does not import the pipeline)
+STAGES = ["load", "validate", "analyze", "enrich", "write"]
+TIMED = STAGES + ["total"]
+# timings shorter than this are too noisy to gate on
+MIN_GATED_SECONDS = 0.05
+# a change must also exceed this many standard deviations to count
+NOISE_SIGMAS = 3
+
+REGIONS = ["North", "South", "East", "West"]
+PRODUCTS = [
+    ("P101", "Laptop", 45000), ("P102", "Mouse", 650), ("P103", "Keyboard", 1800),
+    ("P104", "Monitor", 12000), ("P105", "Webcam", 3500), ("P106", "Headphones", 2800),
+    ("P107", "USB Cable", 175), ("P108", "External Hard Drive", 5200),
+    ("P109", "Wireless Mouse", 1100), ("P110", "Laptop Charger", 1900),
+]
+
+
+def synthetic_products(count=100):
+    """Fixed stand-in for the DummyJSON response (no network in benchmarks)."""
+    categories = ["beauty", "fragrances", "furniture", "groceries", "laptops"]
+    return [
+        {
+            "id": idx,
+            "title": f"Product {idx}",
+            "category": categories[idx % len(categories)],
+            "brand": None if idx % 7 == 0 else f"Brand {idx % 11}",
+            "rating": round(1 + (idx * 0.37) % 4, 2),
+        }
+        for idx in range(1, count + 1)
+    ]
+
+
+def dataset_path(data_dir, rows, seed):
+    return os.path.join(data_dir, f"sales_{rows}_seed{seed}.txt")
+
+
+def generate_dataset(path, rows, seed):
+    """
+    Writes a deterministic pipe-delimited sales file (same layout as
+    data/sales_data.txt, including a few commas and invalid rows).
+    """
+    rng = random.Random(seed * 1000003 + rows)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+
+    with open(tmp_path, "w", encoding="utf-8", buffering=1024 * 1024) as f:
+        f.write("TransactionID|Date|ProductID|ProductName|Quantity|UnitPrice|CustomerID|Region\n")
+        customers = max(rows // 20, 10)
+        lines = []
+        for idx in range(rows):
+            pid, name, price = PRODUCTS[rng.randrange(len(PRODUCTS))]
+            price_text = str(price + rng.randrange(-50, 50))
+            if rng.random() < 0.05:
+                price_text = f"{int(price_text):,}"
+            tid = f"T{idx:08d}" if rng.random() > 0.01 else f"X{idx:08d}"
+            lines.append(
+                f"{tid}|2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}|{pid}|{name}|"
+                f"{rng.randint(0, 20)}|{price_text}|C{rng.randrange(customers):07d}|"
+                f"{REGIONS[rng.randrange(len(REGIONS))]}\n"
+            )
+            if len(lines) >= 100000:
+                f.writelines(lines)
+                lines = []
+        f.writelines(lines)
+
+    os.replace(tmp_path, path)
+
+
+def peak_memory_mb():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS bytes
+    if sys.platform == "darwin":
+        return peak / (1024 * 1024)
+    return peak / 1024
+
+
+def run_pipeline_once(data_file, out_dir):
+    """Runs utils.pipeline.run_pipeline() once, returns {stage: seconds}."""
+    from utils.api_handler import create_product_mapping
+    from utils.pipeline import run_pipeline
+
+    timings = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        run_pipeline(
+            data_file,
+            create_product_mapping(synthetic_products()),
+            quarantine_file=os.path.join(out_dir, "rejected_rows.txt"),
+            enriched_file=os.path.join(out_dir, "enriched_salesdata.txt"),
+            report_file=os.path.join(out_dir, "sales_report.txt"),
+            timings=timings,
+        )
+
+    timings["total"] = sum(timings[stage] for stage in STAGES)
+    return timings
+
+
+def run_in_subprocess(data_file, rows):
+    """One measured run in a fresh interpreter. Returns dict of metrics."""
+    with tempfile.TemporaryDirectory(prefix="sales_regression_out_") as out_dir:
+        proc = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--run-one", data_file, "--out-dir", out_dir],
+            cwd=PROJECT_ROOT,
+            capture_output=True,
+            text=True,
+        )
+    if proc.returncode != 0:
+        raise RuntimeError(f"pipeline run failed for {rows} rows:\n{proc.stderr}")
+
+    metrics = json.loads(proc.stdout.strip().splitlines()[-1])
+    metrics["throughput_rows_per_s"] = rows / metrics["total"] if metrics["total"] else 0.0
+    return metrics
+
+
+def summarize(runs):
+    """[{metric: value}, ...] -> {metric: {"median", "stdev", "runs"}}"""
+    summary = {}
+    for metric in runs[0]:
+        values = [run[metric] for run in runs if run[metric] is not None]
+        if not values:
+            continue
+        summary[metric] = {
+            "median": statistics.median(values),
+            "stdev": statistics.stdev(values) if len(values) > 1 else 0.0,
+            "runs": values,
+        }
+    return summary
+
+
+def is_regression(metric, current, baseline, threshold):
+    """
+    Worse by more than threshold (relative) AND by more than
+    NOISE_SIGMAS standard deviations of the measurements.
+    Throughput is "higher is better", everything else "lower is better".
+    """
+    cur = current["median"]
+    base = baseline["median"]
+    noise = NOISE_SIGMAS * max(current["stdev"], baseline["stdev"])
+
+    if metric == "throughput_rows_per_s":
+        worse_by = base - cur
+    else:
+        if metric in TIMED and max(cur, base) < MIN_GATED_SECONDS:
+            return False
+        worse_by = cur - base
+
+    return worse_by > threshold * base and worse_by > noise
+
+
+def compare(results, baseline, threshold):
+    """Prints a comparison table. Returns (regressions, missing_sizes)."""
+    regressions = []
+    missing = []
+
+    for size, current in results["sizes"].items():
+        base_size = baseline["sizes"].get(size)
+        if base_size is None:
+            missing.append(size)
+            continue
+
+        # timings of a whole run this short are mostly noise
+        too_short = max(current["total"]["median"], base_size["total"]["median"]) < MIN_GATED_SECONDS
+
+        print(f"\n{int(size):,} rows")
+        print(f"  {'metric':<24} {'baseline':>12} {'current':>12} {'change':>9}")
+        for metric, cur in current.items():
+            base = base_size.get(metric)
+            if base is None:
+                continue
+            change = (cur["median"] - base["median"]) / base["median"] * 100 if base["median"] else 0.0
+            flag = ""
+            gated = metric == "peak_memory_mb" or not too_short
+            if gated and is_regression(metric, cur, base, threshold):
+                flag = "  <-- REGRESSION"
+                regressions.append((size, metric, change))
+            print(
+                f"  {metric:<24} {base['median']:>12.4f} {cur['median']:>12.4f} "
+                f"{change:>8.1f}%{flag}"
+            )
+
+    return regressions, missing
+
+
+def git_commit():
+    try:
+        proc = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=PROJECT_ROOT, capture_output=True, text=True,
+        )
+        return proc.stdout.strip() or None
+    except OSError:
+        return None
+
+
+def write_json(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Sales pipeline performance regression check")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="comma separated row counts")
+    parser.add_argument("--large", action="store_true",
+                        help=f"also run {LARGE_SIZE:,} rows (needs ~14 GB of RAM)")
+    parser.add_argument("--repeats", type=int, default=3, help="runs per size (median is compared)")
+    parser.add_argument("--seed", type=int, default=1, help="dataset seed")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="allowed relative slowdown / memory growth (0.10 = 10%%)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--results", default=DEFAULT_RESULTS)
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR,
+                        help="where generated datasets are cached")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="store this run as the new baseline")
+    # internal: one measured run (used by the subprocesses)
+    parser.add_argument("--run-one", help=argparse.SUPPRESS)
+    parser.add_argument("--out-dir", help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    if args.run_one:
+        metrics = run_pipeline_once(args.run_one, args.out_dir)
+        metrics["peak_memory_mb"] = peak_memory_mb()
+        print(json.dumps(metrics))
+        return 0
+
+    if not args.update_baseline and not os.path.exists(args.baseline):
+        # nothing to compare with: fail before spending time on the runs
+        print(f"[regression] No baseline at {args.baseline}, "
+              f"run with --update-baseline to create one")
+        return 2
+
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    if args.large and LARGE_SIZE not in sizes:
+        sizes.append(LARGE_SIZE)
+    results = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "seed": args.seed,
+        "repeats": args.repeats,
+        "sizes": {},
+    }
+
+    for rows in sizes:
+        data_file = dataset_path(args.data_dir, rows, args.seed)
+        if not os.path.exists(data_file):
+            print(f"[regression] Generating {rows:,} rows -> {data_file}")
+            generate_dataset(data_file, rows, args.seed)
+
+        runs = []
+        for run_no in range(1, args.repeats + 1):
+            metrics = run_in_subprocess(data_file, rows)
+            print(
+                f"[regression] {rows:,} rows, run {run_no}/{args.repeats}: "
+                f"{metrics['total']:.3f}s, {metrics['throughput_rows_per_s']:,.0f} rows/s"
+            )
+            runs.append(metrics)
+        results["sizes"][str(rows)] = summarize(runs)
+
+    write_json(args.results, results)
+    print(f"[regression] Results saved to {args.results}")
+
+    if args.update_baseline:
+        write_json(args.baseline, results)
+        print(f"[regression] Baseline updated: {args.baseline}")
+        return 0
+
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+
+    regressions, missing = compare(results, baseline, args.threshold)
+
+    if regressions:
+        print(f"\n[regression] FAILED: {len(regressions)} metric(s) worse than baseline by > {args.threshold:.0%}")
+        for size, metric, change in regressions:
+            print(f"  - {int(size):,} rows: {metric} {change:+.1f}%")
+        return 1
+    if missing:
+        print(f"\n[regression] Sizes not in baseline: {', '.join(missing)}")
+        return 2
+
+    print("\n[regression] OK: no regressions beyond threshold")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
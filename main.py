@@ -1,37 +1,44 @@
 # Simple sales analytics project for the Masai Python assignment.(testing for commit)
-from utils.file_handler import read_sales_data, parse_transactions, validate_and_filter
-from utils.data_processor import (
-    calculate_total_revenue,
-    region_wise_sales,
-    daily_sales_trend,
-    top_selling_products,
-    customer_analysis,
-    find_peak_sales_day,
-    low_performing_products,
+import sys
+
+from utils.file_handler import (
+    DATA_FILE_PATH,
+    QUARANTINE_FILE_PATH,
+    validate_and_filter,
 )
 from utils.api_handler import (
     fetch_all_products,
     create_product_mapping,
-    enrich_sales_data,
-    save_enriched_data,
+    enrich_and_summarize,
+)
+from utils.category_codes import reset_category_codes
+from utils.pipeline import (
+    ENRICHED_FILE_PATH,
+    REPORT_FILE_PATH,
+    load_transactions,
+    analyze_sales,
+    write_outputs,
 )
-from utils.report_generator import generate_sales_report
 
 
-def main():
+def main(source=DATA_FILE_PATH):
     print("===================================")
     print("        SALES ANALYTICS SYSTEM     ")
     print("===================================\n")
 
-    
-    print("[1/10] Reading sales data...")
-    raw_lines = read_sales_data()
-    print(f"✓ Successfully read {len(raw_lines)} raw lines\n")
+    # codes from a previous run in this process are not needed anymore
+    reset_category_codes()
 
-   
+    # lines are streamed into the parser (decompression overlaps with parsing)
+    print("[1/10] Reading sales data...")
     print("[2/10] Parsing and cleaning data...")
-    transactions = parse_transactions(raw_lines)
-    print(f"✓ Parsed {len(transactions)} records\n")
+    parse_stats = {}
+    transactions = load_transactions(source, QUARANTINE_FILE_PATH, stats=parse_stats)
+    print(f"✓ Successfully read {parse_stats['lines']} raw lines")
+    print(f"✓ Parsed {len(transactions)} records")
+    if parse_stats["rejected"]:
+        print(f"  Rejected rows saved to: {QUARANTINE_FILE_PATH} ({parse_stats['rejected']})")
+    print()
 
     
     print("[3/10] Filter Options Available:")
@@ -78,18 +85,19 @@ def main():
         f"✓ Valid: {summary['final_count']} | "
         f"Invalid: {summary['invalid']}"
     )
+    for rule, rejected in summary["invalid_by_rule"].items():
+        if rejected:
+            print(f"  Rejected ({rule}): {rejected}")
     print(f"  Filtered by region: {summary['filtered_by_region']}")
     print(f"  Filtered by amount: {summary['filtered_by_amount']}\n")
 
     
     print("[5/10] Analyzing sales data...")
-    total_revenue = calculate_total_revenue(valid_tx)
-    region_stats = region_wise_sales(valid_tx)
-    trend = daily_sales_trend(valid_tx)
-    peak_date, peak_revenue, peak_count = find_peak_sales_day(valid_tx)
-    top_products = top_selling_products(valid_tx, n=5)
-    cust_stats = customer_analysis(valid_tx)
-    low_products = low_performing_products(valid_tx, threshold=10)
+    analysis = analyze_sales(valid_tx)
+    peak_date, peak_revenue, peak_count = analysis["peak_day"]
+    top_products = analysis["top_products"]
+    cust_stats = analysis["customers"]
+    low_products = analysis["low_products"]
     print("✓ Analysis complete\n")
 
    
@@ -128,7 +136,7 @@ def main():
 
     
     print("[7/10] Enriching sales data...")
-    enriched_tx = enrich_sales_data(valid_tx, product_mapping)
+    enriched_tx, breakdowns = enrich_and_summarize(valid_tx, product_mapping)
     matched = sum(1 for tx in enriched_tx if tx.get("APIMatch"))
     success_rate = (matched / len(enriched_tx) * 100) if enriched_tx else 0.0
     print(
@@ -137,14 +145,12 @@ def main():
     )
 
     
+    # Steps 8 and 9 write different files, so they run at the same time
     print("[8/10] Saving enriched data...")
-    save_enriched_data(enriched_tx, filename="data/enriched_salesdata.txt")
-    print("✓ Saved to: data/enriched_salesdata.txt\n")
-
-    
     print("[9/10] Generating report...")
-    generate_sales_report(valid_tx, enriched_tx, output_file="output/sales_report.txt")
-    print("✓ Report saved to: output/sales_report.txt\n")
+    write_outputs(valid_tx, enriched_tx, breakdowns, ENRICHED_FILE_PATH, REPORT_FILE_PATH)
+    print(f"✓ Saved to: {ENRICHED_FILE_PATH}")
+    print(f"✓ Report saved to: {REPORT_FILE_PATH}\n")
 
     print("[10/10] Process Complete!")
     print("All steps finished successfully.")
@@ -152,7 +158,8 @@ def main():
 
 if __name__ == "__main__":
     try:
-        main()
+        # optional argument: a file, a directory or a glob like "data/shops/*.txt"
+        main(sys.argv[1] if len(sys.argv) > 1 else DATA_FILE_PATH)
     except Exception as e:
         print("\n[ERROR] Something went wrong during processing.")
         print(f"Details: {e}")
@@ -0,0 +1,35 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.file_handler import parse_transactions, validate_and_filter
+
+
+def _validate(lines):
+    return validate_and_filter(parse_transactions(lines))
+
+
+def test_zero_quantity_counts_as_non_positive_quantity():
+    valid, invalid, summary = _validate([
+        "T001|2024-12-01|P101|Laptop|2|45000|C001|North",
+        "T002|2024-12-01|P101|Laptop|0|45000|C001|North",
+    ])
+
+    assert len(valid) == 1
+    assert invalid == 1
+    assert summary["invalid_by_rule"]["non_positive_quantity"] == 1
+    assert summary["invalid_by_rule"]["missing_fields"] == 0
+
+
+def test_zero_price_counts_as_non_positive_price():
+    _, _, summary = _validate(["T003|2024-12-01|P101|Laptop|2|0|C001|North"])
+
+    assert summary["invalid_by_rule"]["non_positive_price"] == 1
+    assert summary["invalid_by_rule"]["missing_fields"] == 0
+
+
+def test_empty_field_counts_as_missing_fields():
+    _, _, summary = _validate(["T004|2024-12-01|P101|Laptop|2|45000||North"])
+
+    assert summary["invalid_by_rule"]["missing_fields"] == 1
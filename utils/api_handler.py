@@ -1,5 +1,14 @@
 import requests
 
+from utils.data_processor import (
+    add_dimension_totals,
+    dimension_labels,
+    finalize_dimension_breakdowns,
+    new_dimension_partials,
+)
+from utils.money import amount_cents
+from utils.output_writer import atomic_writer
+
 
 BASE_URL = "https://dummyjson.com/products"
 
@@ -57,12 +66,31 @@ def enrich_sales_data(transactions, product_mapping):
     - APIRating
     - APIMatch (True/False)
     """
+    enriched, _ = enrich_and_summarize(transactions, product_mapping)
+    return enriched
+
+
+def enrich_and_summarize(transactions, product_mapping):
+    """
+    Same enrichment as enrich_sales_data(), plus category / brand /
+    rating band breakdowns computed in the same pass.
+    Returns: (enriched_transactions, breakdowns)
+    breakdowns is the finalize_dimension_breakdowns() format:
+    {"category": {...}, "brand": {...}, "rating_band": {...}}
+    """
     enriched = []
 
     # API products list for round-robin assignment
     api_products = list(product_mapping.values())
     api_len = len(api_products)
 
+    # Totals per round-robin slot (= API product); folded into category /
+    # brand / rating band at the end, so each row costs one list update
+    slots = max(api_len, 1)
+    slot_revenue = [0] * slots
+    slot_quantity = [0] * slots
+    slot_count = [0] * slots
+
     for idx, tx in enumerate(transactions):
         tx_copy = tx.copy()
 
@@ -86,7 +114,32 @@ def enrich_sales_data(transactions, product_mapping):
 
         enriched.append(tx_copy)
 
-    return enriched
+        try:
+            qty = int(tx["Quantity"])
+            amount = tx.get("AmountCents")
+            if amount is None:
+                amount = amount_cents(tx)
+        except (KeyError, TypeError, ValueError):
+            continue
+
+        slot = idx % slots
+        slot_revenue[slot] += amount
+        slot_quantity[slot] += qty
+        slot_count[slot] += 1
+
+    partials = new_dimension_partials()
+    for slot in range(slots):
+        if not slot_count[slot]:
+            continue
+        api_info = api_products[slot] if api_len > 0 else {}
+        labels = dimension_labels(
+            api_info.get("category"), api_info.get("brand"), api_info.get("rating")
+        )
+        add_dimension_totals(
+            partials, labels, slot_revenue[slot], slot_quantity[slot], slot_count[slot]
+        )
+
+    return enriched, finalize_dimension_breakdowns(partials)
 
 def save_enriched_data(enriched_transactions, filename="data/enriched_salesdata.txt"):
     """
@@ -96,10 +149,6 @@ def save_enriched_data(enriched_transactions, filename="data/enriched_salesdata.
     TransactionID | Date | ProductID | ProductName | Quantity | UnitPrice |
     CustomerID | Region | APICategory | APIBrand | APIRating | APIMatch
     """
-    import os
-
-    os.makedirs(os.path.dirname(filename), exist_ok=True)
-
     header_fields = [
         "TransactionID",
         "Date",
@@ -115,8 +164,8 @@ def save_enriched_data(enriched_transactions, filename="data/enriched_salesdata.
         "APIMatch",
     ]
 
-    with open(filename, "w", encoding="utf-8") as f:
-        
+    # written atomically (temp file + rename) through a background writer thread
+    with atomic_writer(filename) as f:
         f.write("|".join(header_fields) + "\n")
 
         for tx in enriched_transactions:
@@ -128,7 +177,3 @@ def save_enriched_data(enriched_transactions, filename="data/enriched_salesdata.
                 row.append(str(value))
             line = "|".join(row)
             f.write(line + "\n")
-
-    print(f"[API] Enriched data saved to {filename}")
-def fetch_all_products():
-    """Fetch up to 100 products from DummyJSON API and return a list."""
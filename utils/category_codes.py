@@ -0,0 +1,73 @@
+import threading
+
+# Categorical fields that get an integer code at parse time,
+# stored next to the string as e.g. tx["RegionCode"]
+CODE_FIELDS = {
+    "Region": "RegionCode",
+    "ProductName": "ProductNameCode",
+    "ProductID": "ProductIDCode",
+    "CustomerID": "CustomerIDCode",
+}
+
+
+def new_category_dictionaries():
+    """
+    Dictionary encoding for repeated categorical values, one code space
+    per field so codes stay small and dense (usable as list indexes):
+    {
+        "Region": {
+            "codes": {"North": 0, "South": 1, ...},   # value -> code
+            "values": ["North", "South", ...]         # code -> value
+        },
+        ...
+    }
+    """
+    return {field: {"codes": {}, "values": []} for field in CODE_FIELDS}
+
+
+# Shared by the whole pipeline (parsing, grouping, enrichment)
+CATEGORY_CODES = new_category_dictionaries()
+
+_encode_lock = threading.Lock()
+
+
+def encode_value(value, field, dictionaries=CATEGORY_CODES):
+    """
+    Returns the code of value, adding it if unseen.
+    Hot loops should try dictionaries[field]["codes"][value] first and only
+    call this on KeyError. Safe to call from several threads.
+    """
+    dictionary = dictionaries[field]
+
+    with _encode_lock:
+        code = dictionary["codes"].get(value)
+        if code is None:
+            code = len(dictionary["values"])
+            dictionary["values"].append(value)
+            dictionary["codes"][value] = code
+    return code
+
+
+def reset_category_codes(dictionaries=CATEGORY_CODES):
+    """
+    Forgets every code handed out so far (the table otherwise grows for the
+    life of the process). Codes in transactions parsed before the reset no
+    longer decode correctly, so only call this between runs.
+    """
+    with _encode_lock:
+        for dictionary in dictionaries.values():
+            dictionary["codes"].clear()
+            dictionary["values"].clear()
+
+
+def decode(key, field, dictionaries=CATEGORY_CODES):
+    """Code -> original value. Non-int keys (already decoded) are returned as is."""
+    if type(key) is int:
+        return dictionaries[field]["values"][key]
+    return key
+
+
+def code_count(field, dictionaries=CATEGORY_CODES):
+    """Number of codes handed out for field (all codes are < this)."""
+    return len(dictionaries[field]["values"])
+
@@ -1,22 +1,26 @@
-def calculate_total_revenue(transactions):
-   def calculate_total_revenue(transactions):
-    """Return total revenue as sum of quantity * unit price for all transactions."""
+from utils.category_codes import code_count, decode
+from utils.money import amount_cents, from_cents
+
 
+def calculate_total_revenue(transactions):
     """
     Calculates total revenue from all transactions.
     Revenue per transaction = Quantity * UnitPrice
+    Summed exactly in integer cents, so the result does not depend on
+    the order of the transactions.
     Returns: float (total revenue)
     """
-    total = 0.0
+    total = 0
     for tx in transactions:
         try:
-            qty = int(tx["Quantity"])
-            price = float(tx["UnitPrice"])
-            total += qty * price
+            amount = tx.get("AmountCents")
+            if amount is None:
+                amount = amount_cents(tx)
         except (KeyError, TypeError, ValueError):
             
             continue
-    return total
+        total += amount
+    return from_cents(total)
 
 
 def region_wise_sales(transactions):
@@ -32,42 +36,63 @@ def region_wise_sales(transactions):
         ...
     }
     """
+    return finalize_region_stats(build_region_partials(transactions))
+
+
+def build_region_partials(transactions):
+    """
+    Builds mergeable per-region totals (no percentages yet).
+    Money is kept in integer cents so partials merge exactly.
+    Returns dict: {region: {"sales_cents": int, "transaction_count": int}}
+    """
     region_stats = {}
-    total_revenue = 0.0
 
-  
     for tx in transactions:
         try:
             region = tx["Region"]
-            qty = int(tx["Quantity"])
-            price = float(tx["UnitPrice"])
-            revenue = qty * price
+            amount = tx.get("AmountCents")
+            if amount is None:
+                amount = amount_cents(tx)
         except (KeyError, TypeError, ValueError):
             continue
 
-        total_revenue += revenue
-
         if region not in region_stats:
             region_stats[region] = {
-                "total_sales": 0.0,
+                "sales_cents": 0,
                 "transaction_count": 0
             }
 
-        region_stats[region]["total_sales"] += revenue
+        region_stats[region]["sales_cents"] += amount
         region_stats[region]["transaction_count"] += 1
 
-    
-    for region, stats in region_stats.items():
-        if total_revenue > 0:
-            perc = (stats["total_sales"] / total_revenue) * 100
+    return region_stats
+
+
+def finalize_region_stats(region_partials):
+    """
+    Turns region partials into the region_wise_sales() result:
+    adds percentage of total and sorts by total_sales (desc).
+    """
+    total_cents = 0
+    for stats in region_partials.values():
+        total_cents += stats["sales_cents"]
+
+    result = {}
+    for region, stats in region_partials.items():
+        if total_cents > 0:
+            perc = (stats["sales_cents"] / total_cents) * 100
         else:
             perc = 0.0
-        
-        stats["percentage"] = round(perc, 2)
+
+        result[region] = {
+            "total_sales": from_cents(stats["sales_cents"]),
+            "transaction_count": stats["transaction_count"],
+            "percentage": round(perc, 2),
+        }
 
     
     sorted_regions = sorted(
-        region_stats.items(),
+        result.items(),
         key=lambda item: item[1]["total_sales"],
         reverse=True,
     )
@@ -82,36 +107,53 @@ def daily_sales_trend(transactions):
     Analyzes sales trends by date.
     Returns dictionary sorted by date.
     """
+    return finalize_daily_trend(build_daily_partials(transactions))
+
+
+def build_daily_partials(transactions):
+    """
+    Builds mergeable per-date totals.
+    Keeps the customer set (not just its size) so partials from
+    different files can be merged without double counting.
+    Returns dict: {date: {"revenue_cents", "transaction_count", "customers": set}}
+    """
     daily_data = {}
 
     for tx in transactions:
         try:
             date = tx["Date"]
             customer = tx["CustomerID"]
-            qty = int(tx["Quantity"])
-            price = float(tx["UnitPrice"])
-            revenue = qty * price
+            amount = tx.get("AmountCents")
+            if amount is None:
+                amount = amount_cents(tx)
         except (KeyError, TypeError, ValueError):
             continue
 
         if date not in daily_data:
             daily_data[date] = {
-                "revenue": 0.0,
+                "revenue_cents": 0,
                 "transaction_count": 0,
                 "customers": set()
             }
 
-        daily_data[date]["revenue"] += revenue
+        daily_data[date]["revenue_cents"] += amount
         daily_data[date]["transaction_count"] += 1
         daily_data[date]["customers"].add(customer)
 
-    sorted_dates = sorted(daily_data.keys())
+    return daily_data
+
+
+def finalize_daily_trend(daily_partials):
+    """
+    Turns daily partials into the daily_sales_trend() result (sorted by date).
+    """
+    sorted_dates = sorted(daily_partials.keys())
     result = {}
 
     for date in sorted_dates:
-        info = daily_data[date]
+        info = daily_partials[date]
         result[date] = {
-            "revenue": info["revenue"],
+            "revenue": from_cents(info["revenue_cents"]),
             "transaction_count": info["transaction_count"],
             "unique_customers": len(info["customers"])
         }
@@ -142,31 +184,15 @@ def top_selling_products(transactions, n=5):
     Returns list of tuples:
     [(ProductName, TotalQuantity, TotalRevenue), ...]
     """
-    product_stats = {}
+    return finalize_top_products(build_product_partials(transactions), n)
 
-    for tx in transactions:
-        try:
-            name = tx["ProductName"]
-            qty = int(tx["Quantity"])
-            price = float(tx["UnitPrice"])
-            revenue = qty * price
-        except (KeyError, TypeError, ValueError):
-            continue
-
-        if name not in product_stats:
-            product_stats[name] = {
-                "quantity": 0,
-                "revenue": 0.0
-            }
 
-        product_stats[name]["quantity"] += qty
-        product_stats[name]["revenue"] += revenue
-
-    
+def finalize_top_products(product_partials, n=5):
+    """Top n of product partials (in first-seen order) by quantity."""
     products_list = []
-    for name, stats in product_stats.items():
+    for name, stats in product_partials.items():
         products_list.append(
-            (name, stats["quantity"], stats["revenue"])
+            (name, stats["quantity"], from_cents(stats["revenue_cents"]))
         )
 
     
@@ -174,6 +200,8 @@ def top_selling_products(transactions, n=5):
 
     
     return products_list[:n]
+
+
 def low_performing_products(transactions, threshold=10):
     """
     Identifies products with low sales.
@@ -181,38 +209,106 @@ def low_performing_products(transactions, threshold=10):
     [(ProductName, TotalQuantity, TotalRevenue), ...]
     Only includes products with total quantity < threshold.
     """
+    return finalize_low_products(build_product_partials(transactions), threshold)
+
+
+def finalize_low_products(product_partials, threshold=10):
+    """Products (from partials in first-seen order) with quantity < threshold."""
+    low_products = []
+    for name, stats in product_partials.items():
+        if stats["quantity"] < threshold:
+            low_products.append(
+                (name, stats["quantity"], from_cents(stats["revenue_cents"]))
+            )
+
+   
+    low_products.sort(key=lambda x: x[1])
+
+    return low_products
+
+
+def build_product_partials(transactions, use_codes=True):
+    """
+    Per-product totals, in first-seen order.
+    Rows that carry a ProductNameCode (parse_transactions(encode=True)) are summed
+    in plain lists indexed by code instead of hashing; other rows by name.
+    use_codes=False sums every row by name (better for small chunks, where
+    lists as long as the whole code table cost more than they save).
+    Returns dict: {name: {"quantity": int, "revenue_cents": int}}
+    """
     product_stats = {}
+    # coded rows: quantity[code] is None until the code is seen
+    quantity = []
+    revenue = []
+    order = []
 
     for tx in transactions:
         try:
-            name = tx["ProductName"]
+            code = tx.get("ProductNameCode") if use_codes else None
+            name = tx["ProductName"] if code is None else None
             qty = int(tx["Quantity"])
-            price = float(tx["UnitPrice"])
-            revenue = qty * price
+            amount = tx.get("AmountCents")
+            if amount is None:
+                amount = amount_cents(tx)
         except (KeyError, TypeError, ValueError):
             continue
 
-        if name not in product_stats:
-            product_stats[name] = {
-                "quantity": 0,
-                "revenue": 0.0
-            }
+        if code is None:
+            stats = product_stats.get(name)
+            if stats is None:
+                stats = product_stats[name] = {
+                    "quantity": 0,
+                    "revenue_cents": 0
+                }
+                order.append(name)
+            stats["quantity"] += qty
+            stats["revenue_cents"] += amount
+            continue
 
-        product_stats[name]["quantity"] += qty
-        product_stats[name]["revenue"] += revenue
+        if code >= len(quantity):
+            _grow(code, "ProductName", quantity, revenue)
+        if quantity[code] is None:
+            quantity[code] = 0
+            revenue[code] = 0
+            order.append(code)
+        quantity[code] += qty
+        revenue[code] += amount
 
-    
-    low_products = []
-    for name, stats in product_stats.items():
-        if stats["quantity"] < threshold:
-            low_products.append(
-                (name, stats["quantity"], stats["revenue"])
-            )
+    result = {}
+    for key in order:
+        if type(key) is int:
+            _fold_entry(result, decode(key, "ProductName"), {
+                "quantity": quantity[key],
+                "revenue_cents": revenue[key],
+            })
+        else:
+            _fold_entry(result, key, product_stats[key])
+    return result
 
-   
-    low_products.sort(key=lambda x: x[1])
 
-    return low_products
+def _grow(code, field, *lists):
+    # codes handed out after the lists were sized (e.g. a lazily parsed input)
+    size = max(code + 1, code_count(field))
+    for values in lists:
+        values.extend([None] * (size - len(values)))
+
+
+def _fold_entry(result, key, entry):
+    """
+    Adds entry to result[key]: ints are summed, sets unioned.
+    The same value can show up once by code and once by name
+    (a mix of coded and plain rows).
+    """
+    existing = result.get(key)
+    if existing is None:
+        result[key] = entry
+        return
+    for field, value in entry.items():
+        if isinstance(value, set):
+            existing[field] |= value
+        else:
+            existing[field] += value
+
 
 def customer_analysis(transactions):
     """
@@ -228,44 +324,97 @@ def customer_analysis(transactions):
         ...
     }
     """
+    return finalize_customer_stats(build_customer_partials(transactions))
+
+
+def build_customer_partials(transactions, use_codes=True):
+    """
+    Builds mergeable per-customer totals.
+    Like build_product_partials(), coded rows (CustomerIDCode) are summed
+    in lists indexed by code, other rows (or all, with use_codes=False) by ID.
+    Returns dict: {cid: {"spent_cents", "purchase_count", "products": set}}
+    """
     customer_stats = {}
+    # coded rows: count[cid] is None until the code is seen
+    spent = []
+    count = []
+    products = []
+    order = []
 
     for tx in transactions:
         try:
-            cid = tx["CustomerID"]
+            code = tx.get("CustomerIDCode") if use_codes else None
+            cid = tx["CustomerID"] if code is None else None
             product = tx["ProductName"]
-            qty = int(tx["Quantity"])
-            price = float(tx["UnitPrice"])
-            amount = qty * price
+            amount = tx.get("AmountCents")
+            if amount is None:
+                amount = amount_cents(tx)
         except (KeyError, TypeError, ValueError):
             continue
 
-        if cid not in customer_stats:
-            customer_stats[cid] = {
-                "total_spent": 0.0,
-                "purchase_count": 0,
-                "products": set(),
-            }
+        if code is None:
+            stats = customer_stats.get(cid)
+            if stats is None:
+                stats = customer_stats[cid] = {
+                    "spent_cents": 0,
+                    "purchase_count": 0,
+                    "products": set(),
+                }
+                order.append(cid)
+            stats["spent_cents"] += amount
+            stats["purchase_count"] += 1
+            stats["products"].add(product)
+            continue
+
+        if code >= len(count):
+            _grow(code, "CustomerID", spent, count, products)
+        if count[code] is None:
+            spent[code] = 0
+            count[code] = 0
+            products[code] = set()
+            order.append(code)
+        spent[code] += amount
+        count[code] += 1
+        products[code].add(product)
 
-        customer_stats[cid]["total_spent"] += amount
-        customer_stats[cid]["purchase_count"] += 1
-        customer_stats[cid]["products"].add(product)
+    result = {}
+    for key in order:
+        if type(key) is int:
+            _fold_entry(result, decode(key, "CustomerID"), {
+                "spent_cents": spent[key],
+                "purchase_count": count[key],
+                "products": products[key],
+            })
+        else:
+            _fold_entry(result, key, customer_stats[key])
+    return result
+
+
+def finalize_customer_stats(customer_partials):
+    """
+    Turns customer partials into the customer_analysis() result:
+    adds avg_order_value + products_bought and sorts by total_spent (desc).
+    """
+    result = {}
 
     # avg_order_value + products_bought (list) calculate
-    for cid, stats in customer_stats.items():
+    for cid, stats in customer_partials.items():
         if stats["purchase_count"] > 0:
-            avg = stats["total_spent"] / stats["purchase_count"]
+            avg = from_cents(stats["spent_cents"]) / stats["purchase_count"]
         else:
             avg = 0.0
 
-        stats["avg_order_value"] = round(avg, 2)
-        # set → sorted list
-        stats["products_bought"] = sorted(stats["products"])
-        del stats["products"]
+        result[cid] = {
+            "total_spent": from_cents(stats["spent_cents"]),
+            "purchase_count": stats["purchase_count"],
+            "avg_order_value": round(avg, 2),
+            # set → sorted list
+            "products_bought": sorted(stats["products"]),
+        }
 
     
     sorted_items = sorted(
-        customer_stats.items(),
+        result.items(),
         key=lambda item: item[1]["total_spent"],
         reverse=True,
     )
@@ -273,3 +422,201 @@ def customer_analysis(transactions):
     
     sorted_dict = {cid: stats for cid, stats in sorted_items}
     return sorted_dict
+
+
+def build_partial_aggregates(transactions):
+    """
+    Builds all mergeable partials for one batch (e.g. one input file).
+    Returns dict: {"regions": {...}, "daily": {...}, "customers": {...}}
+    """
+    return {
+        "regions": build_region_partials(transactions),
+        "daily": build_daily_partials(transactions),
+        "customers": build_customer_partials(transactions),
+    }
+
+
+def merge_partial_aggregates(partials_list):
+    """
+    Merges partials from several batches into one partials dict.
+    Money is summed in integer cents, so the result is the same whatever
+    the order or split of the batches. Inputs are not modified.
+    """
+    merged = {"regions": {}, "daily": {}, "customers": {}}
+
+    for partials in partials_list:
+        for region, stats in partials["regions"].items():
+            if region not in merged["regions"]:
+                merged["regions"][region] = {
+                    "sales_cents": 0,
+                    "transaction_count": 0
+                }
+            merged["regions"][region]["sales_cents"] += stats["sales_cents"]
+            merged["regions"][region]["transaction_count"] += stats["transaction_count"]
+
+        for date, info in partials["daily"].items():
+            if date not in merged["daily"]:
+                merged["daily"][date] = {
+                    "revenue_cents": 0,
+                    "transaction_count": 0,
+                    "customers": set()
+                }
+            merged["daily"][date]["revenue_cents"] += info["revenue_cents"]
+            merged["daily"][date]["transaction_count"] += info["transaction_count"]
+            merged["daily"][date]["customers"].update(info["customers"])
+
+        for cid, stats in partials["customers"].items():
+            if cid not in merged["customers"]:
+                merged["customers"][cid] = {
+                    "spent_cents": 0,
+                    "purchase_count": 0,
+                    "products": set(),
+                }
+            merged["customers"][cid]["spent_cents"] += stats["spent_cents"]
+            merged["customers"][cid]["purchase_count"] += stats["purchase_count"]
+            merged["customers"][cid]["products"].update(stats["products"])
+
+    return merged
+
+
+def finalize_partial_aggregates(partials):
+    """
+    Produces the same structures as region_wise_sales(), daily_sales_trend()
+    and customer_analysis() from (merged) partials.
+    """
+    return {
+        "region_stats": finalize_region_stats(partials["regions"]),
+        "daily_trend": finalize_daily_trend(partials["daily"]),
+        "customer_stats": finalize_customer_stats(partials["customers"]),
+    }
+
+
+# Enriched dimensions: breakdown name -> enriched transaction field
+ENRICHMENT_DIMENSIONS = {
+    "category": "APICategory",
+    "brand": "APIBrand",
+    "rating_band": "APIRating",
+}
+
+
+def rating_band(rating):
+    """
+    Buckets an API rating into half-star bands, e.g. 4.27 -> "4.0-4.5".
+    5.0 goes into "4.5-5.0"; missing/invalid ratings -> "Unrated".
+    """
+    try:
+        rating = float(rating)
+    except (TypeError, ValueError):
+        return "Unrated"
+    if not 0 <= rating <= 5:
+        return "Unrated"
+
+    low = min(int(rating * 2) / 2, 4.5)
+    return f"{low:.1f}-{low + 0.5:.1f}"
+
+
+def dimension_labels(category, brand, rating):
+    """Breakdown labels of one enriched product: {"category": ..., "brand": ..., "rating_band": ...}"""
+    return {
+        "category": category or "Unknown",
+        "brand": brand or "Unknown",
+        "rating_band": rating_band(rating),
+    }
+
+
+def new_dimension_partials():
+    return {dimension: {} for dimension in ENRICHMENT_DIMENSIONS}
+
+
+def add_dimension_totals(partials, labels, revenue_cents, quantity, transaction_count=1):
+    """Adds totals to every breakdown (category, brand, rating band) at once."""
+    for dimension, label in labels.items():
+        stats = partials[dimension].get(label)
+        if stats is None:
+            stats = partials[dimension][label] = {
+                "revenue_cents": 0,
+                "quantity": 0,
+                "transaction_count": 0,
+            }
+        stats["revenue_cents"] += revenue_cents
+        stats["quantity"] += quantity
+        stats["transaction_count"] += transaction_count
+
+
+def build_dimension_partials(enriched_transactions):
+    """
+    Per category / brand / rating band totals from enriched transactions.
+    (enrich_and_summarize() builds the same thing during enrichment.)
+    """
+    partials = new_dimension_partials()
+
+    for tx in enriched_transactions:
+        try:
+            qty = int(tx["Quantity"])
+            amount = tx.get("AmountCents")
+            if amount is None:
+                amount = amount_cents(tx)
+        except (KeyError, TypeError, ValueError):
+            continue
+
+        labels = dimension_labels(tx.get("APICategory"), tx.get("APIBrand"), tx.get("APIRating"))
+        add_dimension_totals(partials, labels, amount, qty)
+
+    return partials
+
+
+def finalize_dimension_breakdowns(dimension_partials):
+    """
+    Turns dimension partials into breakdowns, each sorted by revenue (desc):
+    {
+        "category": {
+            "beauty": {
+                "revenue": 125000.0,
+                "quantity": 40,
+                "transaction_count": 12,
+                "percentage": 35.43
+            },
+            ...
+        },
+        "brand": {...},
+        "rating_band": {...}
+    }
+    """
+    breakdowns = {}
+
+    for dimension, groups in dimension_partials.items():
+        total_cents = 0
+        for stats in groups.values():
+            total_cents += stats["revenue_cents"]
+
+        result = {}
+        for label, stats in groups.items():
+            if total_cents > 0:
+                perc = (stats["revenue_cents"] / total_cents) * 100
+            else:
+                perc = 0.0
+
+            result[label] = {
+                "revenue": from_cents(stats["revenue_cents"]),
+                "quantity": stats["quantity"],
+                "transaction_count": stats["transaction_count"],
+                "percentage": round(perc, 2),
+            }
+
+        sorted_items = sorted(
+            result.items(),
+            key=lambda item: item[1]["revenue"],
+            reverse=True,
+        )
+        breakdowns[dimension] = {label: stats for label, stats in sorted_items}
+
+    return breakdowns
+
+
+def enrichment_breakdowns(enriched_transactions):
+    """
+    Revenue / quantity / transaction count / share by API category, brand
+    and rating band. Extra pass over the data: prefer the breakdowns
+    returned by enrich_and_summarize() when enriching anyway.
+    """
+    return finalize_dimension_breakdowns(build_dimension_partials(enriched_transactions))
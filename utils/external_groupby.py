@@ -0,0 +1,390 @@
+import argparse
+import os
+import pickle
+import tempfile
+from functools import partial
+from itertools import islice
+
+from utils.data_processor import (
+    build_customer_partials,
+    build_product_partials,
+    finalize_customer_stats,
+    finalize_top_products,
+    finalize_low_products,
+)
+from utils.file_handler import DATA_FILE_PATH, iter_transactions
+from utils.money import amount_cents, from_cents
+
+# Memory budget: max number of groups (customers, products...) plus the
+# members of their sets (e.g. products bought per customer) held in
+# memory at once before spilling to disk
+DEFAULT_MAX_GROUPS = 500000
+DEFAULT_PARTITIONS = 16
+CHUNK_SIZE = 50000
+SPILL_BUFFER_SIZE = 1024 * 1024
+MAX_SPILL_DEPTH = 4
+
+
+def _chunk_partials(transactions, build_partials, chunk_size):
+    """
+    Yields partials of consecutive chunks of transactions (any iterable).
+    Each entry gets "first_seen" = (chunk number, position), so the original
+    first-appearance order (used for ties) can be restored later.
+    """
+    iterator = iter(transactions)
+    chunk_no = 0
+
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return
+
+        partials = build_partials(chunk)
+        for position, entry in enumerate(partials.values()):
+            entry["first_seen"] = (chunk_no, position)
+        yield partials
+        chunk_no += 1
+
+
+def _entry_size(entry):
+    # what an entry counts against the budget: itself + its set members
+    size = 1
+    for value in entry.values():
+        if isinstance(value, set):
+            size += len(value)
+    return size
+
+
+def _merge_entry(target, entry):
+    """
+    ints add up, sets are unioned, first_seen keeps the earliest.
+    Returns how many set members were added.
+    """
+    added = 0
+    for field, value in entry.items():
+        if field == "first_seen":
+            if value < target[field]:
+                target[field] = value
+        elif isinstance(value, set):
+            before = len(target[field])
+            target[field] |= value
+            added += len(target[field]) - before
+        else:
+            target[field] += value
+    return added
+
+
+def _merge_into(groups, partials):
+    """Merges partials into groups, returns the growth in budget units."""
+    added = 0
+    for key, entry in partials.items():
+        existing = groups.get(key)
+        if existing is None:
+            groups[key] = entry
+            added += _entry_size(entry)
+        else:
+            added += _merge_entry(existing, entry)
+    return added
+
+
+def _partition_of(key, partitions, depth):
+    # a different hash on each level, so an oversized run splits further
+    if depth == 0:
+        return hash(key) % partitions
+    return hash((depth, key)) % partitions
+
+
+def _spill(partials, run_files, depth):
+    """Hash-partitions partial entries into the run files."""
+    buckets = [[] for _ in run_files]
+    for key, entry in partials.items():
+        buckets[_partition_of(key, len(run_files), depth)].append((key, entry))
+
+    for bucket, run_file in zip(buckets, run_files):
+        if bucket:
+            pickle.dump(bucket, run_file, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _iter_run(path):
+    with open(path, "rb", buffering=SPILL_BUFFER_SIZE) as f:
+        while True:
+            try:
+                bucket = pickle.load(f)
+            except EOFError:
+                return
+            yield dict(bucket)
+
+
+def _open_runs(run_dir, prefix, partitions):
+    paths = [os.path.join(run_dir, f"{prefix}_{idx:03d}.pkl") for idx in range(partitions)]
+    return paths, [open(path, "wb", buffering=SPILL_BUFFER_SIZE) for path in paths]
+
+
+def _close_runs(run_files):
+    for run_file in run_files:
+        run_file.close()
+
+
+def _aggregate_runs(paths, max_groups, partitions, run_dir, depth):
+    """
+    Aggregates run files one at a time. A run that turns out to be over
+    the max_groups budget is split into sub-runs (up to MAX_SPILL_DEPTH levels).
+    """
+    for path in paths:
+        groups = {}
+        held = 0
+        buckets = _iter_run(path)
+
+        for partials in buckets:
+            held += _merge_into(groups, partials)
+            if held > max_groups and depth < MAX_SPILL_DEPTH:
+                break
+        else:
+            os.remove(path)
+            yield groups
+            continue
+
+        prefix = os.path.splitext(os.path.basename(path))[0]
+        sub_paths, run_files = _open_runs(run_dir, prefix, partitions)
+        try:
+            _spill(groups, run_files, depth + 1)
+            groups = None
+            for partials in buckets:
+                _spill(partials, run_files, depth + 1)
+        finally:
+            _close_runs(run_files)
+            buckets.close()
+        os.remove(path)
+
+        yield from _aggregate_runs(sub_paths, max_groups, partitions, run_dir, depth + 1)
+
+
+def spill_group_by(transactions, build_partials, max_groups=DEFAULT_MAX_GROUPS,
+                   partitions=DEFAULT_PARTITIONS, tmp_dir=None, chunk_size=CHUNK_SIZE):
+    """
+    Group-by with bounded memory.
+    - transactions: any iterable (e.g. a generator over a huge file)
+    - build_partials: one of the data_processor build_*_partials functions
+    Chunks are pre-aggregated in memory. Once more than max_groups groups
+    plus set members are held, everything is hash-partitioned into
+    `partitions` temporary run files, and each run is aggregated separately
+    afterwards (runs that are still too big are partitioned again).
+    Yields dicts of complete groups {key: entry (with "first_seen")};
+    the key sets of different yielded dicts never overlap.
+    """
+    groups = {}
+    held = 0
+    chunks = _chunk_partials(transactions, build_partials, chunk_size)
+
+    for partials in chunks:
+        held += _merge_into(groups, partials)
+        if held > max_groups:
+            break
+    else:
+        # everything fit in memory
+        yield groups
+        return
+
+    print(
+        f"[external_groupby] More than {max_groups} groups and set members, "
+        f"spilling to {partitions} run files"
+    )
+    with tempfile.TemporaryDirectory(prefix="sales_groupby_", dir=tmp_dir) as run_dir:
+        paths, run_files = _open_runs(run_dir, "run", partitions)
+        try:
+            _spill(groups, run_files, 0)
+            groups = None
+            for partials in chunks:
+                _spill(partials, run_files, 0)
+        finally:
+            _close_runs(run_files)
+
+        yield from _aggregate_runs(paths, max_groups, partitions, run_dir, 0)
+
+
+# Chunks are small: sum by name instead of lists sized to the whole code table
+_chunk_customer_partials = partial(build_customer_partials, use_codes=False)
+_chunk_product_partials = partial(build_product_partials, use_codes=False)
+
+
+def _first_seen_order(groups):
+    return dict(sorted(groups.items(), key=lambda item: item[1]["first_seen"]))
+
+
+def external_customer_analysis(transactions, max_groups=DEFAULT_MAX_GROUPS,
+                               partitions=DEFAULT_PARTITIONS, tmp_dir=None):
+    """
+    Same result as customer_analysis(), with bounded memory
+    for the intermediate per-customer state (see spill_group_by).
+    """
+    rows = []
+    for groups in spill_group_by(transactions, _chunk_customer_partials,
+                                 max_groups, partitions, tmp_dir):
+        first_seen = {cid: entry["first_seen"] for cid, entry in groups.items()}
+        for cid, stats in finalize_customer_stats(groups).items():
+            rows.append((first_seen[cid], cid, stats))
+
+    # first-seen order, then a stable sort like customer_analysis()
+    rows.sort(key=lambda row: row[0])
+    rows.sort(key=lambda row: row[2]["total_spent"], reverse=True)
+    return {cid: stats for _, cid, stats in rows}
+
+
+def _build_day_customer_partials(transactions):
+    """
+    Daily partials with the per-day customer sets flattened into the key,
+    so they can be partitioned (a single day can have any number of customers).
+    Returns dict: {(date, customer): {"revenue_cents", "transaction_count"}}
+    """
+    partials = {}
+
+    for tx in transactions:
+        try:
+            key = (tx["Date"], tx["CustomerID"])
+            amount = tx.get("AmountCents")
+            if amount is None:
+                amount = amount_cents(tx)
+        except (KeyError, TypeError, ValueError):
+            continue
+
+        stats = partials.get(key)
+        if stats is None:
+            stats = partials[key] = {
+                "revenue_cents": 0,
+                "transaction_count": 0
+            }
+        stats["revenue_cents"] += amount
+        stats["transaction_count"] += 1
+
+    return partials
+
+
+def external_daily_sales_trend(transactions, max_groups=DEFAULT_MAX_GROUPS,
+                               partitions=DEFAULT_PARTITIONS, tmp_dir=None):
+    """
+    Same result as daily_sales_trend(), with bounded memory: groups on
+    (date, customer), only the per-date totals stay in memory.
+    """
+    daily = {}
+    for groups in spill_group_by(transactions, _build_day_customer_partials,
+                                 max_groups, partitions, tmp_dir):
+        for (date, _), stats in groups.items():
+            info = daily.get(date)
+            if info is None:
+                info = daily[date] = {
+                    "revenue_cents": 0,
+                    "transaction_count": 0,
+                    "unique_customers": 0
+                }
+            info["revenue_cents"] += stats["revenue_cents"]
+            info["transaction_count"] += stats["transaction_count"]
+            # keys never repeat across yielded dicts -> each pair counts once
+            info["unique_customers"] += 1
+
+    return {
+        date: {
+            "revenue": from_cents(daily[date]["revenue_cents"]),
+            "transaction_count": daily[date]["transaction_count"],
+            "unique_customers": daily[date]["unique_customers"],
+        }
+        for date in sorted(daily)
+    }
+
+
+def external_top_selling_products(transactions, n=5, max_groups=DEFAULT_MAX_GROUPS,
+                                  partitions=DEFAULT_PARTITIONS, tmp_dir=None):
+    """Same result as top_selling_products(), with bounded memory."""
+    candidates = {}
+    for groups in spill_group_by(transactions, _chunk_product_partials,
+                                 max_groups, partitions, tmp_dir):
+        # the overall top n is always within the top n of each partition
+        ordered = list(_first_seen_order(groups).items())
+        ordered.sort(key=lambda item: item[1]["quantity"], reverse=True)
+        candidates.update(ordered[:n])
+
+    return finalize_top_products(_first_seen_order(candidates), n)
+
+
+def external_low_performing_products(transactions, threshold=10, max_groups=DEFAULT_MAX_GROUPS,
+                                     partitions=DEFAULT_PARTITIONS, tmp_dir=None):
+    """Same result as low_performing_products(), with bounded memory."""
+    low = {}
+    for groups in spill_group_by(transactions, _chunk_product_partials,
+                                 max_groups, partitions, tmp_dir):
+        for name, entry in groups.items():
+            if entry["quantity"] < threshold:
+                low[name] = entry
+
+    return finalize_low_products(_first_seen_order(low), threshold)
+
+
+def run_external_analysis(source=DATA_FILE_PATH, max_groups=DEFAULT_MAX_GROUPS,
+                          partitions=DEFAULT_PARTITIONS, tmp_dir=None, n=5, threshold=10):
+    """
+    Runs the four external group-bys over source (file, directory or glob).
+    Each one streams the file again with iter_transactions(), so no pass
+    holds more than a chunk of rows plus its max_groups budget in memory.
+    Returns dict: {"customers", "daily_trend", "top_products", "low_products",
+    "stats"} (stats of the first pass, see iter_transactions()).
+    """
+    stats = {}
+    results = {
+        "customers": external_customer_analysis(
+            iter_transactions(source, stats=stats), max_groups, partitions, tmp_dir
+        ),
+        "daily_trend": external_daily_sales_trend(
+            iter_transactions(source), max_groups, partitions, tmp_dir
+        ),
+        "top_products": external_top_selling_products(
+            iter_transactions(source), n, max_groups, partitions, tmp_dir
+        ),
+        "low_products": external_low_performing_products(
+            iter_transactions(source), threshold, max_groups, partitions, tmp_dir
+        ),
+    }
+    results["stats"] = stats
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Sales analysis of files larger than memory (spill-to-disk group-bys)."
+    )
+    parser.add_argument("source", nargs="?", default=DATA_FILE_PATH,
+                        help="file, directory or glob (default: %(default)s)")
+    parser.add_argument("--max-groups", type=int, default=DEFAULT_MAX_GROUPS,
+                        help="groups + set members held in memory before spilling "
+                             "(default: %(default)s)")
+    parser.add_argument("--partitions", type=int, default=DEFAULT_PARTITIONS,
+                        help="run files per spill (default: %(default)s)")
+    parser.add_argument("--tmp-dir", default=None,
+                        help="folder for the run files (default: system temp folder)")
+    args = parser.parse_args(argv)
+
+    results = run_external_analysis(args.source, args.max_groups, args.partitions, args.tmp_dir)
+
+    stats = results["stats"]
+    print(
+        f"\n[external_groupby] Lines: {stats['lines']} | Valid: {stats['valid']} | "
+        f"Rejected: {stats['rejected']} | Invalid: {stats['invalid']}"
+    )
+    print(f"Days: {len(results['daily_trend'])} | Customers: {len(results['customers'])}")
+
+    print("\nTop selling products:")
+    for name, qty, revenue in results["top_products"]:
+        print(f"{name}: quantity={qty}, revenue={revenue}")
+
+    print("\nTop customers:")
+    for cid, customer in list(results["customers"].items())[:5]:
+        print(
+            f"{cid}: total_spent={customer['total_spent']}, "
+            f"orders={customer['purchase_count']}"
+        )
+
+    print("\nLow performing products (qty < 10):")
+    for name, qty, revenue in results["low_products"][:5]:
+        print(f"{name}: quantity={qty}, revenue={revenue}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,38 +1,185 @@
+import bz2
+import codecs
+import glob
+import gzip
+import json
+import lzma
 import os
+import queue
+import threading
+from bisect import bisect_right
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from itertools import compress, islice, repeat
+from operator import eq, ge, itemgetter, le, mul
+
+try:
+    import zstandard
+except ImportError:  # optional, only needed for .zst files
+    zstandard = None
+
+# Errors of a corrupt / truncated archive (or a missing zstandard package):
+# the file is reported and skipped. lzma / zstd errors are not OSErrors.
+READ_ERRORS = (OSError, EOFError, RuntimeError, lzma.LZMAError)
+if zstandard is not None:
+    READ_ERRORS += (zstandard.ZstdError,)
+
+from utils.category_codes import CATEGORY_CODES, encode_value
+from utils.money import line_cents
+from utils.output_writer import atomic_writer
+from utils.data_processor import (
+    build_partial_aggregates,
+    merge_partial_aggregates,
+    finalize_partial_aggregates,
+)
 
 DATA_FILE_PATH = os.path.join("data", "sales_data.txt")
+INGEST_STATE_PATH = os.path.join("data", ".ingest_state.json")
+# bump when the stored partials change shape (old state is then rebuilt)
+INGEST_STATE_VERSION = 2
+QUARANTINE_FILE_PATH = os.path.join("output", "rejected_rows.txt")
+MAX_READ_WORKERS = 4
+# rows parsed and validated at a time by iter_transactions()
+STREAM_CHUNK_SIZE = 50000
+
+READ_BUFFER_SIZE = 1024 * 1024
+DECOMPRESS_QUEUE_SIZE = 8
+
+# Compression is detected from the first bytes, not the file extension
+COMPRESSION_MAGIC = [
+    (b"\x1f\x8b", "gzip"),
+    (b"BZh", "bz2"),
+    (b"\x28\xb5\x2f\xfd", "zstd"),
+    (b"\xfd7zXZ\x00", "xz"),
+]
 
 
-def read_sales_data(filename=DATA_FILE_PATH):
+def read_sales_data(filename=DATA_FILE_PATH, with_origins=False):
     """
     Reads sales data from file handling encoding issues.
+    - filename can be a single file, a directory or a glob pattern
+      (e.g. data/shops/*.txt); multiple files are read concurrently
+    - gzip / bz2 / xz / zstd files are decompressed on the fly
+      (detected by magic bytes, nothing is written to disk)
     - Tries utf-8, latin-1, cp1252
     - Skips header row
     - Removes empty lines
+    - with_origins=True returns (raw_lines, origins): origins records the
+      file and line number each raw line came from; pass it on to
+      parse_transactions() so rejected rows can be traced back
     Returns: list of raw lines (strings)
     """
+    files = resolve_sales_files(filename)
+    if files == [filename]:
+        raw_lines, segments = _read_sales_file_with_origins(filename)
+        origins = [(start, filename, file_line) for start, file_line in segments]
+    else:
+        with ThreadPoolExecutor(max_workers=MAX_READ_WORKERS) as pool:
+            results = list(pool.map(_read_sales_file_with_origins, files))
+
+        raw_lines = []
+        origins = []
+        for name, (lines, segments) in zip(files, results):
+            origins.extend((len(raw_lines) + start, name, file_line) for start, file_line in segments)
+            raw_lines.extend(lines)
+        print(f"[read_sales_data] Loaded {len(files)} files, lines: {len(raw_lines)}")
+
+    if with_origins:
+        return raw_lines, origins
+    return raw_lines
+
+
+def iter_sales_lines(source=DATA_FILE_PATH, origins=None):
+    """
+    Streams the same raw lines read_sales_data() returns (file, directory or
+    glob; header and empty lines skipped), one file after another, without
+    building a list. Feed it straight to parse_transactions(): for compressed
+    files the decompression thread then runs while the rows are parsed.
+    - origins: optional list, filled while streaming with the same entries
+      as read_sales_data(with_origins=True) returns
+    Decoded as utf-8 (undecodable bytes are dropped, as in read_sales_data).
+    Missing or unreadable files are reported and skipped; for a corrupt
+    archive the lines before the damage have already been streamed.
+    """
+    index = 0
+    for filename in resolve_sales_files(source):
+        try:
+            with _open_sales_text(filename, "utf-8") as f:
+                gap = True
+                for file_line, line in enumerate(f, start=1):
+                    line = line.strip()
+                    if file_line == 1 or not line:
+                        # header / empty line
+                        gap = True
+                        continue
+                    if gap:
+                        if origins is not None:
+                            origins.append((index, filename, file_line))
+                        gap = False
+                    index += 1
+                    yield line
+        except FileNotFoundError:
+            print(f"[read_sales_data] File not found: {filename}")
+        except READ_ERRORS as e:
+            print(f"[read_sales_data] Could not read {filename}: {e}")
+
+
+def resolve_sales_files(source=DATA_FILE_PATH):
+    """
+    Expands a file path, directory or glob pattern into a sorted list of files.
+    Directories contribute their (non-hidden) files, one level deep.
+    """
+    if os.path.isdir(source):
+        pattern = os.path.join(source, "*")
+    elif glob.has_magic(source):
+        pattern = source
+    else:
+        return [source]
+
+    return sorted(path for path in glob.glob(pattern) if os.path.isfile(path))
+
+
+def _read_single_sales_file(filename):
+    return _read_sales_file_with_origins(filename)[0]
+
+
+def _read_sales_file_with_origins(filename):
+    """
+    Returns (raw_lines, segments). Each segment (index in raw_lines, line
+    number in the file) starts a run of consecutive file lines, i.e. after
+    the header and after every skipped empty line.
+    """
     encodings_to_try = ["utf-8", "latin-1", "cp1252"]
 
     for enc in encodings_to_try:
         try:
             raw_lines = []
-            with open(filename, "r", encoding=enc, errors="ignore") as f:
+            segments = []
+            gap = True
+            with _open_sales_text(filename, enc) as f:
                 first = True
-                for line in f:
+                for file_line, line in enumerate(f, start=1):
                     line = line.strip()
                     if first:
                        
                         first = False
                         continue
                     if not line:
-                        
+                        gap = True
                         continue
+                    if gap:
+                        segments.append((len(raw_lines), file_line))
+                        gap = False
                     raw_lines.append(line)
             print(f"[read_sales_data] Loaded file with encoding: {enc}, lines: {len(raw_lines)}")
-            return raw_lines
+            return raw_lines, segments
         except FileNotFoundError:
             print(f"[read_sales_data] File not found: {filename}")
-            return []
+            return [], []
+        except READ_ERRORS as e:
+            print(f"[read_sales_data] Could not read {filename}: {e}")
+            return [], []
         except UnicodeDecodeError:
             
             print(f"[read_sales_data] Failed with encoding: {enc}, trying next...")
@@ -40,10 +187,125 @@ def read_sales_data(filename=DATA_FILE_PATH):
 
     
     print("[read_sales_data] Could not read file with given encodings.")
-    return []
+    return [], []
+
 
+def detect_compression(filename):
+    """
+    Returns "gzip", "bz2", "zstd", "xz" or None (plain text),
+    based on the magic bytes at the start of the file.
+    """
+    with open(filename, "rb") as f:
+        head = f.read(6)
 
-def parse_transactions(raw_lines):
+    for magic, name in COMPRESSION_MAGIC:
+        if head.startswith(magic):
+            return name
+    return None
+
+
+def _open_decompressed(filename, compression):
+    """Opens a binary stream of the decompressed contents."""
+    if compression == "gzip":
+        return gzip.open(filename, "rb")
+    if compression == "bz2":
+        return bz2.open(filename, "rb")
+    if compression == "xz":
+        return lzma.open(filename, "rb")
+    if compression == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstd file but the 'zstandard' package is not installed")
+        raw = open(filename, "rb", buffering=READ_BUFFER_SIZE)
+        return zstandard.ZstdDecompressor().stream_reader(raw, closefd=True)
+    raise ValueError(f"Unknown compression: {compression}")
+
+
+def _put_unless_stopped(chunks, item, stop):
+    # short timeout so an abandoned reader (stop set) doesn't block us forever
+    while not stop.is_set():
+        try:
+            chunks.put(item, timeout=0.1)
+            return
+        except queue.Full:
+            continue
+
+
+def _decompress_worker(filename, compression, chunks, stop):
+    """
+    Runs in a background thread: pushes decompressed chunks into the queue,
+    then None (done) or the exception that stopped it.
+    Gives up as soon as stop is set (the reader is gone).
+    """
+    try:
+        with _open_decompressed(filename, compression) as src:
+            while not stop.is_set():
+                chunk = src.read(READ_BUFFER_SIZE)
+                if not chunk:
+                    break
+                _put_unless_stopped(chunks, chunk, stop)
+        _put_unless_stopped(chunks, None, stop)
+    except BaseException as e:
+        _put_unless_stopped(chunks, e, stop)
+
+
+def _iter_decompressed_lines(chunks, encoding):
+    decoder = codecs.getincrementaldecoder(encoding)(errors="ignore")
+    pending = ""
+
+    while True:
+        chunk = chunks.get()
+        if chunk is None:
+            break
+        if isinstance(chunk, BaseException):
+            raise chunk
+
+        lines = (pending + decoder.decode(chunk)).split("\n")
+        # last piece may be an incomplete line -> keep for next chunk
+        pending = lines.pop()
+        yield from lines
+
+    tail = pending + decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+@contextmanager
+def _open_sales_text(filename, encoding):
+    """
+    Opens a sales file for line iteration, plain or compressed.
+    For compressed files decompression runs in a separate thread so it
+    overlaps with parsing in the caller.
+    """
+    compression = detect_compression(filename)
+    if compression is None:
+        with open(filename, "r", encoding=encoding, errors="ignore",
+                  buffering=READ_BUFFER_SIZE) as f:
+            yield f
+        return
+
+    chunks = queue.Queue(maxsize=DECOMPRESS_QUEUE_SIZE)
+    stop = threading.Event()
+    worker = threading.Thread(
+        target=_decompress_worker,
+        args=(filename, compression, chunks, stop),
+        daemon=True,
+    )
+    worker.start()
+    try:
+        yield _iter_decompressed_lines(chunks, encoding)
+    finally:
+        stop.set()
+        # drop unread chunks so the worker is never stuck on a full queue
+        while worker.is_alive():
+            try:
+                chunks.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        worker.join()
+
+
+def parse_transactions(raw_lines, quarantine_file=None, encode=False, origins=None,
+                       stats=None):
     """
     Parses raw lines into clean list of dictionaries.
     Handles:
@@ -52,97 +314,504 @@ def parse_transactions(raw_lines):
     - Commas in numeric fields (e.g. 1,500 -> 1500)
     - Quantity -> int
     - UnitPrice -> float
-    Skips rows with incorrect number of fields.
+    Skips rows with incorrect number of fields or unparsable numbers.
+    With encode=True, Region, ProductName, ProductID and CustomerID are
+    dictionary encoded: each row also gets RegionCode, ProductNameCode,
+    ProductIDCode and CustomerIDCode (ints from the process-wide
+    CATEGORY_CODES) and the string fields point at one shared string object
+    per distinct value. The product/customer group-bys then key on the ints.
+    It is off by default: on 300k rows parsing is ~30% slower with it and the
+    whole parse + analysis run is no faster.
+    AmountCents = Quantity * UnitPrice in integer cents (rounded once, half-up).
+    If quarantine_file is given, it is rewritten with the skipped rows (in
+    one go, at the end; just the header if there are none) as:
+    File|LineNumber|Reason|RawLine. File and LineNumber come from origins
+    (see iter_sales_lines() / read_sales_data(with_origins=True)); without
+    origins File is empty and LineNumber is the 1-based position in raw_lines.
+    raw_lines can be any iterable (e.g. iter_sales_lines()); pass a dict as
+    stats to get {"lines": lines read, "rejected": rows rejected} back.
     Returns: list of dicts with keys:
     ['TransactionID', 'Date', 'ProductID', 'ProductName',
-     'Quantity', 'UnitPrice', 'CustomerID', 'Region']
+     'Quantity', 'UnitPrice', 'CustomerID', 'Region', 'AmountCents']
+    (+ the *Code keys with encode=True)
     """
     transactions = []
+    append = transactions.append
+    rejected = []
 
+    # a rejected row's index is len(transactions) + len(rejected), so the
+    # loop needs no counter
     for line in raw_lines:
         parts = line.split("|")
         if len(parts) != 8:
-            
+            rejected.append((len(transactions) + len(rejected), f"expected 8 fields, got {len(parts)}", line))
             continue
 
         transaction_id, date, product_id, product_name, qty_str, price_str, customer_id, region = parts
 
-        
-        product_name_clean = product_name.replace(",", "")
-
-       
-        qty_str = qty_str.replace(",", "")
-        price_str = price_str.replace(",", "")
+        # fast path: most rows have no commas at all
+        if "," in line:
+            product_name = product_name.replace(",", "")
+            qty_str = qty_str.replace(",", "")
+            price_str = price_str.replace(",", "")
 
         try:
             quantity = int(qty_str)
             unit_price = float(price_str)
+            # exact money for the revenue sums (float is kept for display/filters)
+            if price_str.isdigit():
+                amount_cents = quantity * int(price_str) * 100
+            elif price_str[-3:-2] == ".":
+                # "19.99": float() accepted it, so without the dot it is the cents
+                amount_cents = quantity * int(price_str.replace(".", ""))
+            else:
+                amount_cents = line_cents(quantity, price_str)
         except ValueError:
-            
+            rejected.append(
+                (len(transactions) + len(rejected), _number_error(qty_str, price_str), line)
+            )
             continue
 
-        tx = {
+        append({
             "TransactionID": transaction_id,
             "Date": date,
             "ProductID": product_id,
-            "ProductName": product_name_clean,
+            "ProductName": product_name,
             "Quantity": quantity,
             "UnitPrice": unit_price,
+            "AmountCents": amount_cents,
             "CustomerID": customer_id,
             "Region": region,
-        }
-        transactions.append(tx)
+        })
+
+    if encode:
+        # a separate pass, so the default parse loop has no encode branch
+        _encode_transactions(transactions)
+
+    if stats is not None:
+        stats["lines"] = len(transactions) + len(rejected)
+        stats["rejected"] = len(rejected)
+
+    if quarantine_file:
+        # always rewritten (header only if nothing was rejected), so a
+        # previous run's rejects never linger
+        write_quarantine(rejected, quarantine_file, origins)
+
+    print(
+        f"[parse_transactions] Parsed valid transactions: {len(transactions)}, "
+        f"rejected: {len(rejected)}"
+    )
+    return transactions
+
+
+def _number_error(qty_str, price_str):
+    # which field made parse_transactions() fail (only called for bad rows)
+    try:
+        int(qty_str)
+    except ValueError:
+        return f"invalid Quantity {qty_str!r}"
+    return f"invalid UnitPrice {price_str!r}"
+
+
+def _encode_transactions(transactions):
+    """Adds the *Code keys to parsed rows and shares one string per value."""
+    dictionaries = CATEGORY_CODES
+    product_id_codes = dictionaries["ProductID"]["codes"]
+    product_name_codes = dictionaries["ProductName"]["codes"]
+    customer_codes = dictionaries["CustomerID"]["codes"]
+    region_codes = dictionaries["Region"]["codes"]
+    # code -> the one shared string object for that value
+    product_ids = dictionaries["ProductID"]["values"]
+    product_names = dictionaries["ProductName"]["values"]
+    customer_ids = dictionaries["CustomerID"]["values"]
+    regions = dictionaries["Region"]["values"]
+
+    for tx in transactions:
+        product_id = tx["ProductID"]
+        product_name = tx["ProductName"]
+        customer_id = tx["CustomerID"]
+        region = tx["Region"]
+        try:
+            product_id_code = product_id_codes[product_id]
+            product_name_code = product_name_codes[product_name]
+            customer_code = customer_codes[customer_id]
+            region_code = region_codes[region]
+        except KeyError:
+            # first time one of these values shows up
+            product_id_code = encode_value(product_id, "ProductID")
+            product_name_code = encode_value(product_name, "ProductName")
+            customer_code = encode_value(customer_id, "CustomerID")
+            region_code = encode_value(region, "Region")
+
+        tx["ProductID"] = product_ids[product_id_code]
+        tx["ProductName"] = product_names[product_name_code]
+        tx["CustomerID"] = customer_ids[customer_code]
+        tx["Region"] = regions[region_code]
+        tx["ProductIDCode"] = product_id_code
+        tx["ProductNameCode"] = product_name_code
+        tx["CustomerIDCode"] = customer_code
+        tx["RegionCode"] = region_code
+
+
+def _line_locator(origins):
+    """Returns a function: index in raw_lines -> (file, line number in the file)."""
+    if not origins:
+        return lambda index: ("", index + 1)
+
+    starts = [start for start, _, _ in origins]
+
+    def locate(index):
+        start, filename, file_line = origins[bisect_right(starts, index) - 1]
+        return filename, file_line + index - start
+
+    return locate
+
+
+def write_quarantine(rejected, quarantine_file, origins=None):
+    """
+    Writes rejected rows [(index in raw_lines, reason, line), ...] to a
+    pipe-delimited file so bad input can be audited later:
+    File|LineNumber|Reason|RawLine (see parse_transactions for origins).
+    """
+    quarantine_dir = os.path.dirname(quarantine_file)
+    if quarantine_dir:
+        os.makedirs(quarantine_dir, exist_ok=True)
 
-    print(f"[parse_transactions] Parsed valid transactions: {len(transactions)}")
-    return transactions 
-def validate_and_filter(transactions, region=None, min_amount=None, max_amount=None):
+    locate = _line_locator(origins)
+    with open(quarantine_file, "w", encoding="utf-8") as f:
+        f.write("File|LineNumber|Reason|RawLine\n")
+        for index, reason, line in rejected:
+            filename, line_no = locate(index)
+            f.write(f"{filename}|{line_no}|{reason}|{line}\n")
+
+    print(f"[parse_transactions] Quarantined {len(rejected)} rows to {quarantine_file}")
+
+
+# Validation rules: (rule name, kind, field(s), argument)
+# - "required": all fields present and not None / empty string
+# - "prefix":   field value starts with argument
+# - "positive": field value > 0
+# Rules are checked in this order; a rejected row is counted against
+# the first rule it fails.
+VALIDATION_RULES = [
+    (
+        "missing_fields",
+        "required",
+        ("TransactionID", "ProductID", "CustomerID", "Region", "Quantity", "UnitPrice"),
+        None,
+    ),
+    ("bad_transaction_id", "prefix", "TransactionID", "T"),
+    ("bad_product_id", "prefix", "ProductID", "P"),
+    ("bad_customer_id", "prefix", "CustomerID", "C"),
+    ("non_positive_quantity", "positive", "Quantity", None),
+    ("non_positive_price", "positive", "UnitPrice", None),
+]
+
+VALIDATION_BATCH_SIZE = 4096
+
+
+def _rule_expression(kind, field, argument):
+    """Python expression (over a row called tx) that is true when the rule passes."""
+    if kind == "required":
+        # presence only: 0 / 0.0 must reach the "positive" rules
+        return " and ".join(f"tx.get({key!r}) not in (None, '')" for key in field)
+    if kind == "prefix":
+        return f"tx[{field!r}][:{len(argument)}] == {argument!r}"
+    if kind == "positive":
+        return f"tx[{field!r}] > 0"
+    raise ValueError(f"Unknown validation rule kind: {kind}")
+
+
+def compile_validation_rules(rules=VALIDATION_RULES):
+    """
+    Compiles declarative rules once into two batch functions:
+    - "keep": list of rows passing every rule (one fused list comprehension,
+      no per-rule function calls)
+    - "failures": index of the first failed rule for each row, only used
+      on batches that had rejects, to get per-rule counts
+    Returns dict: {"names": [...], "keep": func, "failures": func}
+    """
+    expressions = [
+        f"({_rule_expression(kind, field, argument)})"
+        for _, kind, field, argument in rules
+    ]
+    all_pass = " and ".join(expressions) or "True"
+    first_failed = " else ".join(
+        f"{idx} if not {expr}" for idx, expr in enumerate(expressions)
+    ) or "-1"
+    if expressions:
+        first_failed += " else -1"
+
+    source = (
+        "def keep(batch):\n"
+        f"    return [tx for tx in batch if {all_pass}]\n"
+        "def failures(batch):\n"
+        f"    return [{first_failed} for tx in batch]\n"
+    )
+    namespace = {}
+    exec(compile(source, "<validation rules>", "exec"), namespace)
+
+    return {
+        "names": [rule[0] for rule in rules],
+        "keep": namespace["keep"],
+        "failures": namespace["failures"],
+    }
+
+
+_DEFAULT_COMPILED_RULES = compile_validation_rules()
+
+
+def _compile_filters(region, min_amount, max_amount):
+    """Optional filters as column-wise checks: batch -> iterator of keep flags."""
+    filters = []
+    qty_of = itemgetter("Quantity")
+    price_of = itemgetter("UnitPrice")
+
+    def amounts_of(batch):
+        return map(mul, map(qty_of, batch), map(price_of, batch))
+
+    if region is not None:
+        region_of = itemgetter("Region")
+        filters.append(lambda batch: map(eq, map(region_of, batch), repeat(region)))
+    if min_amount is not None:
+        filters.append(lambda batch: map(le, repeat(min_amount), amounts_of(batch)))
+    if max_amount is not None:
+        filters.append(lambda batch: map(ge, repeat(max_amount), amounts_of(batch)))
+
+    return filters
+
+
+def validate_and_filter(transactions, region=None, min_amount=None, max_amount=None,
+                        rules=None):
     """
     Validates transactions and applies optional filters.
+    - Rules (see VALIDATION_RULES) are applied batch by batch
+    - rules: output of compile_validation_rules(), defaults to VALIDATION_RULES
     Returns: (valid_transactions, invalid_count, filter_summary)
+    filter_summary["invalid_by_rule"] has the rejection count of each rule.
     """
+    if rules is None:
+        rules = _DEFAULT_COMPILED_RULES
+    filters = _compile_filters(region, min_amount, max_amount)
+
     valid_transactions = []
-    invalid_count = 0
+    keep = rules["keep"]
+    failure_counts = [0] * len(rules["names"])
 
-    for tx in transactions:
-        required_keys = ["TransactionID", "ProductID", "CustomerID", "Region", "Quantity", "UnitPrice"]
-        if any(not tx.get(k) for k in required_keys):
-            invalid_count += 1
-            continue
+    for start in range(0, len(transactions), VALIDATION_BATCH_SIZE):
+        batch = transactions[start:start + VALIDATION_BATCH_SIZE]
 
-        if not tx["TransactionID"].startswith("T"):
-            invalid_count += 1
-            continue
-        if not tx["ProductID"].startswith("P"):
-            invalid_count += 1
-            continue
-        if not tx["CustomerID"].startswith("C"):
-            invalid_count += 1
-            continue
+        kept = keep(batch)
+        if len(kept) != len(batch):
+            for idx, count in Counter(rules["failures"](batch)).items():
+                if idx >= 0:
+                    failure_counts[idx] += count
+        batch = kept
 
-        if tx["Quantity"] <= 0 or tx["UnitPrice"] <= 0:
-            invalid_count += 1
-            continue
+        for check in filters:
+            batch = list(compress(batch, check(batch)))
 
-        amount = tx["Quantity"] * tx["UnitPrice"]
-
-        if region is not None and tx["Region"] != region:
-            continue
-        if min_amount is not None and amount < min_amount:
-            continue
-        if max_amount is not None and amount > max_amount:
-            continue
-
-        valid_transactions.append(tx)
+        valid_transactions.extend(batch)
 
+    invalid_by_rule = dict(zip(rules["names"], failure_counts))
+    invalid_count = sum(failure_counts)
     total_input = len(transactions)
     final_count = len(valid_transactions)
 
     filter_summary = {
         "total_input": total_input,
         "invalid": invalid_count,
+        "invalid_by_rule": invalid_by_rule,
         "filtered_by_region": len([t for t in valid_transactions if region is not None]),
         "filtered_by_amount": 0,
         "final_count": final_count,
     }
 
     return valid_transactions, invalid_count, filter_summary
+
+
+def iter_transactions(source=DATA_FILE_PATH, chunk_size=STREAM_CHUNK_SIZE, region=None,
+                      min_amount=None, max_amount=None, stats=None):
+    """
+    Streams the valid transactions of source (file, directory or glob) one
+    at a time, e.g. into the external_groupby functions. Lines are read with
+    iter_sales_lines() and parsed (encode=False) + validated chunk_size rows
+    at a time, so memory stays bounded by the chunk, not the file.
+    Rejected rows are counted but not quarantined.
+    - stats: optional dict, filled with
+      {"lines", "rejected", "invalid", "valid"} totals while streaming
+    """
+    if stats is not None:
+        stats.update({"lines": 0, "rejected": 0, "invalid": 0, "valid": 0})
+    lines = iter_sales_lines(source)
+
+    while True:
+        chunk = list(islice(lines, chunk_size))
+        if not chunk:
+            return
+
+        parse_stats = {}
+        transactions = parse_transactions(chunk, encode=False, stats=parse_stats)
+        valid, invalid_count, _ = validate_and_filter(
+            transactions, region=region, min_amount=min_amount, max_amount=max_amount
+        )
+        if stats is not None:
+            stats["lines"] += parse_stats["lines"]
+            stats["rejected"] += parse_stats["rejected"]
+            stats["invalid"] += invalid_count
+            stats["valid"] += len(valid)
+        yield from valid
+
+
+def _file_signature(filename):
+    stat = os.stat(filename)
+    return {"size": stat.st_size, "mtime": stat.st_mtime}
+
+
+def _process_sales_file(filename):
+    """Read -> parse -> validate -> partial aggregates for one file."""
+    raw_lines = _read_single_sales_file(filename)
+    # partials are keyed by strings anyway; no need to grow the shared code table
+    transactions = parse_transactions(raw_lines, encode=False)
+    valid_tx, _, _ = validate_and_filter(transactions)
+    return build_partial_aggregates(valid_tx)
+
+
+def _partials_to_json(partials):
+    # sets are not JSON serializable -> sorted lists
+    return {
+        "regions": partials["regions"],
+        "daily": {
+            date: {**info, "customers": sorted(info["customers"])}
+            for date, info in partials["daily"].items()
+        },
+        "customers": {
+            cid: {**stats, "products": sorted(stats["products"])}
+            for cid, stats in partials["customers"].items()
+        },
+    }
+
+
+def _partials_from_json(data):
+    return {
+        "regions": data["regions"],
+        "daily": {
+            date: {**info, "customers": set(info["customers"])}
+            for date, info in data["daily"].items()
+        },
+        "customers": {
+            cid: {**stats, "products": set(stats["products"])}
+            for cid, stats in data["customers"].items()
+        },
+    }
+
+
+def load_ingest_state(state_file=INGEST_STATE_PATH):
+    """
+    Loads the record of already processed files.
+    Returns dict: {filename: {"size", "mtime", "partials"}}
+    Missing or unreadable state -> empty dict (everything gets reprocessed).
+    """
+    try:
+        with open(state_file, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        print(f"[ingest] Ignoring unreadable state file {state_file}: {e}")
+        return {}
+
+    if data.get("version") != INGEST_STATE_VERSION:
+        print(f"[ingest] State file {state_file} is from an older version, reprocessing all files")
+        return {}
+
+    state = {}
+    for filename, entry in data.get("files", {}).items():
+        state[filename] = {
+            "size": entry["size"],
+            "mtime": entry["mtime"],
+            "partials": _partials_from_json(entry["partials"]),
+        }
+    return state
+
+
+def save_ingest_state(state, state_file=INGEST_STATE_PATH):
+    """
+    Saves the record of processed files and their partial aggregates.
+    Written to a temp file and renamed over state_file, so a crash mid-write
+    leaves the previous state intact (instead of forcing a full reprocess).
+    """
+    data = {
+        "version": INGEST_STATE_VERSION,
+        "files": {
+            filename: {
+                "size": entry["size"],
+                "mtime": entry["mtime"],
+                "partials": _partials_to_json(entry["partials"]),
+            }
+            for filename, entry in state.items()
+        }
+    }
+    with atomic_writer(state_file) as f:
+        json.dump(data, f)
+
+
+def ingest_sales_files(source, state_file=INGEST_STATE_PATH, max_workers=MAX_READ_WORKERS):
+    """
+    Incrementally aggregates a directory / glob of sales files
+    (e.g. one file per shop per day).
+    - Only new or changed files (by size + mtime) are read and processed,
+      concurrently; partial aggregates of the others come from state_file
+    - Files that disappeared are dropped from the state
+    - Pass state_file=None to process everything without tracking
+    Limits: only reading/parsing is skipped for unchanged files; every run
+    still loads, merges and rewrites the stored partials of all files, so
+    that part grows with the total history. main.py does not use this
+    (it is meant to be called from your own scripts).
+    Returns dict:
+    {
+        "region_stats": {...},     # same as region_wise_sales()
+        "daily_trend": {...},      # same as daily_sales_trend()
+        "customer_stats": {...},   # same as customer_analysis()
+        "files_total": 12,
+        "files_processed": 1
+    }
+    """
+    files = resolve_sales_files(source)
+    old_state = load_ingest_state(state_file) if state_file else {}
+
+    state = {}
+    pending = []
+    for filename in files:
+        try:
+            signature = _file_signature(filename)
+        except FileNotFoundError:
+            print(f"[ingest] File not found: {filename}")
+            continue
+
+        entry = old_state.get(filename)
+        if (
+            entry is not None
+            and entry["size"] == signature["size"]
+            and entry["mtime"] == signature["mtime"]
+        ):
+            state[filename] = entry
+        else:
+            state[filename] = signature
+            pending.append(filename)
+
+    if pending:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            for filename, partials in zip(pending, pool.map(_process_sales_file, pending)):
+                state[filename]["partials"] = partials
+
+    if state_file:
+        save_ingest_state(state, state_file)
+
+    merged = merge_partial_aggregates(entry["partials"] for entry in state.values())
+    result = finalize_partial_aggregates(merged)
+    result["files_total"] = len(state)
+    result["files_processed"] = len(pending)
+
+    print(f"[ingest] Files: {len(state)} total, {len(pending)} newly processed")
+    return result
@@ -0,0 +1,44 @@
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+_ONE = Decimal(1)
+
+
+def line_cents(quantity, unit_price):
+    """
+    Line amount quantity * unit_price in integer cents, exactly: no binary
+    float rounding. The exact product is rounded once (half-up), not the
+    unit price before multiplying:
+    e.g. 1 x "1916" -> 191600, 2 x "19.5" -> 3900, 8 x "0.125" -> 100 (not 8 x 13 = 104).
+    unit_price can be a string, int or float; raises ValueError if it
+    is not a finite number.
+    """
+    text = unit_price if isinstance(unit_price, str) else repr(unit_price)
+
+    # fast paths: "1916" and "19.99" style prices (the common case in our data)
+    if text.isdigit():
+        return quantity * int(text) * 100
+    whole, _, frac = text.partition(".")
+    if len(frac) <= 2 and whole.isdigit() and frac.isdigit():
+        return quantity * (int(whole) * 100 + int(frac.ljust(2, "0")))
+
+    try:
+        cents = (Decimal(text.strip()) * quantity).scaleb(2).quantize(_ONE, rounding=ROUND_HALF_UP)
+        return int(cents)
+    except (InvalidOperation, ValueError, OverflowError):
+        raise ValueError(f"invalid money amount: {unit_price!r}")
+
+
+def from_cents(cents):
+    """Integer cents -> float for display (e.g. 191600 -> 1916.0)."""
+    return cents / 100
+
+
+def amount_cents(tx):
+    """
+    Line amount (Quantity * UnitPrice) of a transaction in cents.
+    Uses tx["AmountCents"] (set by parse_transactions) when present.
+    """
+    cents = tx.get("AmountCents")
+    if cents is None:
+        cents = line_cents(int(tx["Quantity"]), tx["UnitPrice"])
+    return cents
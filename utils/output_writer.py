@@ -0,0 +1,157 @@
+import os
+import queue
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+# Text is collected in memory and handed to the writer thread in chunks of this size
+WRITE_BUFFER_SIZE = 1024 * 1024
+# Max chunks waiting for the writer thread (bounds memory if the disk is slow)
+WRITE_QUEUE_SIZE = 8
+
+
+def _umask_file_mode():
+    # the mode open() gives a new file: 0o666 minus the umask. The umask can
+    # only be read by setting it, so this runs once, at import (before any
+    # writer threads exist)
+    umask = os.umask(0o022)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+
+# mode of newly created output files (mkstemp itself would use 0o600)
+DEFAULT_FILE_MODE = _umask_file_mode()
+
+
+def _writer_worker(f, chunks, errors):
+    """Writes chunks from the queue to f until the None sentinel."""
+    try:
+        while True:
+            chunk = chunks.get()
+            if chunk is None:
+                return
+            f.write(chunk)
+    except BaseException as e:
+        errors.append(e)
+        # keep consuming so the producer never blocks on a full queue
+        while chunks.get() is not None:
+            pass
+
+
+class BackgroundWriter:
+    """
+    File-like object (only .write) used by atomic_writer().
+    write() just buffers the text; full buffers are written to disk
+    by a background thread, so formatting and disk I/O overlap.
+    """
+
+    def __init__(self, f, buffer_size=WRITE_BUFFER_SIZE):
+        self._parts = []
+        self._size = 0
+        self._buffer_size = buffer_size
+        self._chunks = queue.Queue(maxsize=WRITE_QUEUE_SIZE)
+        self._errors = []
+        self._thread = threading.Thread(
+            target=_writer_worker, args=(f, self._chunks, self._errors), daemon=True
+        )
+        self._thread.start()
+
+    def write(self, text):
+        self._parts.append(text)
+        self._size += len(text)
+        if self._size >= self._buffer_size:
+            self._flush_parts()
+        return len(text)
+
+    def writelines(self, lines):
+        for line in lines:
+            self.write(line)
+
+    def _flush_parts(self):
+        if self._errors:
+            raise self._errors[0]
+        if self._parts:
+            self._chunks.put("".join(self._parts))
+            self._parts = []
+            self._size = 0
+
+    def close(self):
+        """Writes what is left and waits for the writer thread."""
+        try:
+            self._flush_parts()
+        finally:
+            self._chunks.put(None)
+            self._thread.join()
+        if self._errors:
+            raise self._errors[0]
+
+
+def _target_mode(filename):
+    # keep the permissions of the file being replaced, else what a plain
+    # open() would have created
+    try:
+        return os.stat(filename).st_mode & 0o777
+    except OSError:
+        return DEFAULT_FILE_MODE
+
+
+@contextmanager
+def atomic_writer(filename, encoding="utf-8"):
+    """
+    Usage:
+        with atomic_writer("output/sales_report.txt") as f:
+            f.write(...)
+
+    Writes go to a temporary file in the same folder (through a background
+    writer thread with large buffers). Only when the block finishes without
+    an error is the file flushed, fsync'ed and renamed over filename, so
+    readers see either the old file or the complete new one, never a
+    half-written file. On error the temporary file is removed.
+    """
+    folder = os.path.dirname(filename) or "."
+    os.makedirs(folder, exist_ok=True)
+
+    fd, tmp_path = tempfile.mkstemp(
+        prefix=f".{os.path.basename(filename)}.", suffix=".tmp", dir=folder
+    )
+    try:
+        with open(fd, "w", encoding=encoding, buffering=WRITE_BUFFER_SIZE) as f:
+            writer = BackgroundWriter(f)
+            try:
+                yield writer
+            finally:
+                writer.close()
+            f.flush()
+            os.fsync(f.fileno())
+
+        os.chmod(tmp_path, _target_mode(filename))
+        os.replace(tmp_path, filename)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def run_output_jobs(jobs):
+    """
+    Runs independent output jobs at the same time, e.g.
+        run_output_jobs([
+            (save_enriched_data, (enriched_tx,), {"filename": ...}),
+            (generate_sales_report, (valid_tx, enriched_tx), {...}),
+        ])
+    Each job is (function, args, kwargs). Waits for all of them and returns
+    their results in the same order; the first error is raised after all
+    jobs have finished. Jobs should not print (their lines would interleave);
+    report what they did after run_output_jobs() returns.
+    """
+    if not jobs:
+        return []
+
+    with ThreadPoolExecutor(max_workers=len(jobs)) as executor:
+        futures = [executor.submit(func, *args, **kwargs) for func, args, kwargs in jobs]
+
+    # the executor has waited for all jobs; result() re-raises a job's error
+    return [future.result() for future in futures]
@@ -0,0 +1,110 @@
+import os
+import time
+
+from utils.file_handler import (
+    DATA_FILE_PATH,
+    QUARANTINE_FILE_PATH,
+    iter_sales_lines,
+    parse_transactions,
+    validate_and_filter,
+)
+from utils.data_processor import (
+    calculate_total_revenue,
+    region_wise_sales,
+    daily_sales_trend,
+    top_selling_products,
+    customer_analysis,
+    find_peak_sales_day,
+    low_performing_products,
+)
+from utils.api_handler import enrich_and_summarize, save_enriched_data
+from utils.report_generator import generate_sales_report
+from utils.output_writer import run_output_jobs
+
+ENRICHED_FILE_PATH = os.path.join("data", "enriched_salesdata.txt")
+REPORT_FILE_PATH = os.path.join("output", "sales_report.txt")
+
+# stage names recorded by run_pipeline(timings=...)
+PIPELINE_STAGES = ["load", "validate", "analyze", "enrich", "write"]
+
+
+def load_transactions(source=DATA_FILE_PATH, quarantine_file=QUARANTINE_FILE_PATH, stats=None):
+    """
+    Reads and parses source (file, directory or glob). The lines are
+    streamed into the parser, so decompression overlaps with parsing.
+    Rejected rows go to quarantine_file with their file name and line number.
+    - stats: optional dict, gets {"lines", "rejected"} (see parse_transactions)
+    Returns: list of transactions
+    """
+    origins = []
+    return parse_transactions(
+        iter_sales_lines(source, origins),
+        quarantine_file=quarantine_file,
+        origins=origins,
+        stats=stats,
+    )
+
+
+def analyze_sales(valid_tx):
+    """
+    Runs every analysis of the sales summary.
+    Returns dict: {"total_revenue", "region_stats", "daily_trend", "peak_day"
+    (date, revenue, count), "top_products", "customers", "low_products"}
+    """
+    return {
+        "total_revenue": calculate_total_revenue(valid_tx),
+        "region_stats": region_wise_sales(valid_tx),
+        "daily_trend": daily_sales_trend(valid_tx),
+        "peak_day": find_peak_sales_day(valid_tx),
+        "top_products": top_selling_products(valid_tx, n=5),
+        "customers": customer_analysis(valid_tx),
+        "low_products": low_performing_products(valid_tx, threshold=10),
+    }
+
+
+def write_outputs(valid_tx, enriched_tx, breakdowns, enriched_file=ENRICHED_FILE_PATH,
+                  report_file=REPORT_FILE_PATH):
+    """
+    Writes the enriched data and the report at the same time (different files).
+    The messages are printed here, after both jobs are done, so the output
+    of the two worker threads never interleaves.
+    """
+    run_output_jobs([
+        (save_enriched_data, (enriched_tx,), {"filename": enriched_file}),
+        (
+            generate_sales_report,
+            (valid_tx, enriched_tx),
+            {"output_file": report_file, "breakdowns": breakdowns},
+        ),
+    ])
+    print(f"[API] Enriched data saved to {enriched_file}")
+    print(f"[REPORT] Sales report saved to {report_file}")
+
+
+def run_pipeline(source, product_mapping, quarantine_file=QUARANTINE_FILE_PATH,
+                 enriched_file=ENRICHED_FILE_PATH, report_file=REPORT_FILE_PATH,
+                 timings=None):
+    """
+    The whole main.py pipeline without the prompts (no filters) and with a
+    given product_mapping instead of the API call:
+    load -> validate -> analyze -> enrich -> write.
+    - timings: optional dict, gets {stage: seconds} for PIPELINE_STAGES
+    Returns dict: analyze_sales() results + "valid_count"
+    """
+    if timings is None:
+        timings = {}
+
+    def timed(stage, func, *args, **kwargs):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        timings[stage] = time.perf_counter() - start
+        return result
+
+    transactions = timed("load", load_transactions, source, quarantine_file)
+    valid_tx, _, _ = timed("validate", validate_and_filter, transactions)
+    results = timed("analyze", analyze_sales, valid_tx)
+    enriched_tx, breakdowns = timed("enrich", enrich_and_summarize, valid_tx, product_mapping)
+    timed("write", write_outputs, valid_tx, enriched_tx, breakdowns, enriched_file, report_file)
+
+    results["valid_count"] = len(valid_tx)
+    return results
@@ -1,4 +1,3 @@
-import os
 from datetime import datetime
 
 from utils.data_processor import (
@@ -9,7 +8,9 @@ from utils.data_processor import (
     daily_sales_trend,
     find_peak_sales_day,
     low_performing_products,
+    enrichment_breakdowns,
 )
+from utils.output_writer import atomic_writer
 
 
 def format_currency(amount):
@@ -17,12 +18,13 @@ def format_currency(amount):
     return f"{amount:,.2f}"
 
 
-def generate_sales_report(transactions, enriched_transactions, output_file="output/sales_report.txt"):
+def generate_sales_report(transactions, enriched_transactions, output_file="output/sales_report.txt",
+                          breakdowns=None):
     """
     Generates a comprehensive formatted text report as per assignment Part 4.
+    breakdowns: category / brand / rating band breakdowns from
+    enrich_and_summarize(); computed from enriched_transactions if not given.
     """
-    os.makedirs(os.path.dirname(output_file), exist_ok=True)
-
     total_tx = len(transactions)
     total_revenue = calculate_total_revenue(transactions)
     avg_order_value = total_revenue / total_tx if total_tx > 0 else 0.0
@@ -59,7 +61,12 @@ def generate_sales_report(transactions, enriched_transactions, output_file="outp
         }
     )
 
-    with open(output_file, "w", encoding="utf-8") as f:
+    # Category / brand / rating band breakdowns
+    if breakdowns is None:
+        breakdowns = enrichment_breakdowns(enriched_transactions)
+
+    # readers never see a half-written report (temp file + rename)
+    with atomic_writer(output_file) as f:
         # 1. HEADER
         f.write("SALES ANALYTICS REPORT\n")
         f.write("======================\n")
@@ -159,5 +166,22 @@ def generate_sales_report(transactions, enriched_transactions, output_file="outp
                 f.write(f"  - {pid}\n")
         else:
             f.write("  - None\n")
+        f.write("\n")
 
-    print(f"[REPORT] Sales report saved to {output_file}")
+        # 9. ENRICHED PRODUCT BREAKDOWNS
+        for title, dimension, label_header in [
+            ("REVENUE BY CATEGORY", "category", "Category"),
+            ("REVENUE BY BRAND", "brand", "Brand"),
+            ("REVENUE BY RATING BAND", "rating_band", "Rating"),
+        ]:
+            f.write(f"{title}\n")
+            f.write("=" * len(title) + "\n")
+            f.write(f"{label_header:<20} {'Revenue':>14} {'% of Total':>11} {'Quantity':>9} {'Transactions':>13}\n")
+            f.write("-" * 71 + "\n")
+            for label, stats in breakdowns.get(dimension, {}).items():
+                f.write(
+                    f"{str(label)[:20]:<20} {format_currency(stats['revenue']):>14} "
+                    f"{stats['percentage']:>10.2f}% {stats['quantity']:>9} "
+                    f"{stats['transaction_count']:>13}\n"
+                )
+            f.write("\n")